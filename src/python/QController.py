@@ -11,7 +11,7 @@ import requests
 import signal
 import sys
 import time
-from   threading import Thread
+from   threading import Thread, Lock
 from   typing import override
 import socket
 
@@ -23,7 +23,7 @@ from   ZmqPPWrapper  import ZmqPPWrapperType
 
 # CLI arg parsing and server invocation
 
-from   jsonArgParse import JSONArgParse, inRangeType, minFloatType, rangeType, httpEndpoint, tcpEndpoint, endpointArgs, orbitAppArgs, satAppArgs, hilArgs
+from   jsonArgParse import JSONArgParse, inRangeType, minFloatType, rangeType, httpEndpoint, tcpEndpoint, endpointArgs, orbitAppArgs, satAppArgs, hilArgs, shardRanges
 
 ###########
 # Globals #
@@ -44,20 +44,27 @@ def get_ip_address():
 
 
 class FlaskQController (JSONArgParse):
+    NODE_TIMEOUT  = 15.0        # seconds without a heartbeat after which a sharding node is dropped (cf., constApp.py)
+    URGENT_TOPICS = ('start', 'stop', 'debug', 'exfilt', 'shard')     # published ahead of bulk topics (e.g., 'thirdParty')
 
     class _ZMQueuePub():
 
         def __init__(self, host, zmqPubOpt, zmq_pub):
             endpoint = f'tcp://{host}:{zmq_pub}'
-            self._zmq_pub = ZmqPublisher(None, endpoint, '', ZmqPPWrapperType.JSON)
+            self._zmq_pub = ZmqPublisher(None, endpoint, '', ZmqPPWrapperType.JSON,
+                                         urgent_topics=FlaskQController.URGENT_TOPICS,
+                                         subscribers=0)     # apps subscribe later; 'start' is on demand
 
             self._zmq_pub.run (f'ZMQ {zmqPubOpt} Msg Publication')
 
             _logger.info(f'Started ZeroMQ {zmqPubOpt} publication thread ({endpoint})')
 
-        def queue_message(self, obj, topic=None):
+        def queue_message(self, obj, topic=None, urgent=None):
             if self._zmq_pub:
-                self._zmq_pub.queue_message(obj, topic)
+                self._zmq_pub.queue_message(obj, topic, urgent)
+
+        def stats(self):
+            return self._zmq_pub.stats() if self._zmq_pub else None
 
         def terminate(self):
             if self._zmq_pub:
@@ -120,6 +127,15 @@ class FlaskQController (JSONArgParse):
         except Exception as _e:
             abort(HTTPStatus.BAD_REQUEST, 'Bad JSON input')
 
+    @staticmethod
+    def _get_post_list():
+        try:
+            content = request.get_json(force=True)
+
+            return content if isinstance(content, list) else None
+        except Exception as _e:
+            abort(HTTPStatus.BAD_REQUEST, 'Bad JSON input')
+
     @classmethod
     def _get_rest_dict(cls, *args):
         _dict = dict(request.args)
@@ -289,6 +305,11 @@ class FlaskQController (JSONArgParse):
         self.totSatInts = self._args.num_planes * self._args.num_sats * len (self.epArgs)
         self.lastStart  = None          # initial start time for restarted processes
         self.hilArgs    = hilArgs (self._args)
+        self.nodes      = dict ()       # sharding (constApp) nodes; key: <node>, val: last heartbeat (cf., time.monotonic ())
+        self.shards     = dict ()       # sharding nodes' satellite index ranges; key: <node>, val: (<begin>, <end>)
+        self.shardEpoch = 0.0           # time of the latest sharding nodes' assignment
+        self._nodesLock = Lock ()       # mutex for nodes, shards, and shardEpoch
+        self._satLock   = Lock ()       # mutex for satInts and lastStart (acquired before _nodesLock)
 
         if self._debug:
             _logger.info('*** DEBUG MODE ***')
@@ -373,9 +394,55 @@ class FlaskQController (JSONArgParse):
     def _return_image_response(self, _obj, _status, _iType):
         return self._return_response(_obj, _status, lambda _cnt: _cnt, f'image/{_iType}')
 
-    def _queue_message(self, obj, topic=None):
+    def _queue_message(self, obj, topic=None, urgent=None):
         if self._zmq_pub:
-            self._zmq_pub.queue_message(obj, topic)
+            self._zmq_pub.queue_message(obj, topic, urgent)
+
+    ##################
+    # Sharding nodes #
+    ##################
+
+    def _shard_assignment (self) -> dict:
+        return {'epoch': self.shardEpoch, 'nodes': self.shards}
+
+    def _rebalance_shards (self):      # caller holds self._nodesLock
+
+        # Partition the satellites (plane-major) among the nodes, in node name order, and publish
+        # the assignment; each node stops satellites assigned elsewhere and starts its own
+
+        _ranges         = shardRanges (self._args.num_planes * self._args.num_sats, len (self.nodes))
+        self.shards     = dict (zip (sorted (self.nodes.keys ()), _ranges))
+        self.shardEpoch = max (time.time (), self.shardEpoch + 0.001)
+
+        _logger.info(f'Sharding nodes: {self.shards}')
+
+        self._queue_message (self._shard_assignment (), 'shard')
+
+    def _monitor_nodes (self):
+
+        # Drop sharding nodes that stopped sending heartbeats, along with their satellite intervals,
+        # and reassign their satellites
+
+        while True:
+            time.sleep (self.NODE_TIMEOUT / 3.0)
+
+            with self._satLock, self._nodesLock:
+                _now   = time.monotonic ()
+                _stale = [_node for _node, _heartbeat in self.nodes.items () if _now - _heartbeat > self.NODE_TIMEOUT]
+
+                for _node in _stale:
+                    _logger.warning(f'Sharding node {_node} lost; reassigning its satellites')
+
+                    del self.nodes[_node]
+                    for _satTuple, _pDict in list (self.satInts.items ()):
+                        if _pDict.get ('node') == _node:
+                            del self.satInts[_satTuple]
+
+                if _stale:
+                    if len (self.satInts) == 0:
+                        self.lastStart = None
+                    if self.nodes:
+                        self._rebalance_shards ()
 
     #############
     # Endpoints #
@@ -425,6 +492,12 @@ class FlaskQController (JSONArgParse):
                         _pruneSatTuple ()
                     else:
                         self.satInts.clear ()
+
+                        # The sharding nodes stop with the constellation
+
+                        with self._nodesLock:
+                            self.nodes.clear ()
+                            self.shards = dict ()
         
                     if len (self.satInts) == 0:
                         self.lastStart = None
@@ -443,7 +516,7 @@ class FlaskQController (JSONArgParse):
                         _pDict['host']    = _hk
                         _pruneSatTuple ()
 
-                        self._queue_message (dict (_pDict), 'stop')
+                        self._queue_message (dict (_pDict), 'stop', False)      # per-host fan-out: bulk lane
 
                     if len (self.satInts) == 0:
                         self.lastStart = None
@@ -478,10 +551,41 @@ class FlaskQController (JSONArgParse):
                 for _interval, _poList in _intPos.items ():
                     _msgs.append (f'{_interval}: {sorted (_poList)}')
             
+            with self._nodesLock:
+                for _node, (_begin, _end) in sorted (self.shards.items ()):
+                    if _end > _begin:
+                        _first = divmod (_begin,   self._args.num_sats)
+                        _last  = divmod (_end - 1, self._args.num_sats)
+                        _msgs.append (f'node {_node}: {_first[0] + 1:02d}_{_first[1] + 1:02d}..{_last[0] + 1:02d}_{_last[1] + 1:02d}')
+                    else:
+                        _msgs.append (f'node {_node}: no satellites')
+
+            if self._zmq_pub and (_stats := self._zmq_pub.stats ()):
+                _msgs.append (f"ZMQ publication: {_stats['published']}/{_stats['queued']} published, {_stats['dropped']} dropped, "
+                              f"depth {_stats['depth']} (max {_stats['maxDepth']}), "
+                              f"latency {_stats['meanLate'] * 1000.0:.3f} ms (max {_stats['maxLate'] * 1000.0:.3f} ms), "
+                              f"urgent {_stats['urgent']} (max {_stats['maxUrgent'] * 1000.0:.3f} ms)")
+
             _msgs.append (_msg)
 
             return self._return_text_response ('\n'.join (_msgs), HTTPStatus.OK)
 
+        def _handleShard ():
+            if not isinstance (_node := _pDict.get ('node'), str) or not _node:
+                return self._return_text_response (f'Bad node ({_pDict})', HTTPStatus.BAD_REQUEST)
+
+            # Heartbeat; a new node joins, and the satellites are rebalanced
+
+            with self._nodesLock:
+                _joined           = _node not in self.nodes
+                self.nodes[_node] = time.monotonic ()
+
+                if _joined:
+                    _logger.info(f'Sharding node {_node} joined')
+                    self._rebalance_shards ()
+
+                return self._return_json_response (self._shard_assignment (), HTTPStatus.OK)
+
         def _getSatIntParams (_pDict: dict):
             if (_iPlane := _pDict.get ('plane')) and (_iSat := _pDict.get ('ordinal')) and \
                (_interval := _pDict.get ('interval')):
@@ -495,6 +599,44 @@ class FlaskQController (JSONArgParse):
 
             return None
 
+        def _handleRegister (_dSats: list):
+            _bad = list ()
+            for _dSat in _dSats:
+                if isinstance (_dSat, dict) and isinstance (_satTuple := _getSatIntParams (_dSat), tuple):
+                    self.satInts[_satTuple] = _dSat
+                else:
+                    _bad.append (_dSat)
+
+            # When all satellite intervals are registered, publish 'start'
+
+            if len (_bad) < len (_dSats) and len (self.satInts) == self.totSatInts:
+                _queueStart ()
+
+            if _bad:
+                return self._return_text_response (f'Bad plane/ordinal ({", ".join (map (str, _bad))})', HTTPStatus.BAD_REQUEST)
+
+            return self._return_text_response ('OK', HTTPStatus.OK)
+
+        def _handleUnregister (_dSats: list):
+            _bad  = list ()
+            _msgs = list ()
+            for _dSat in _dSats:
+                if not isinstance (_dSat, dict) or not isinstance (_satTuple := _getSatIntParams (_dSat), tuple):
+                    _bad.append (_dSat)
+                elif _satTuple not in self.satInts:
+                    _msgs.append (f'WARNING: unknown satellite interval ({_dSat})')
+                elif self.satInts[_satTuple].get ('node') != _dSat.get ('node'):
+                    _msgs.append (f'INFO: satellite interval reassigned ({_dSat})')
+                else:
+                    del self.satInts[_satTuple]
+                    if len (self.satInts) == 0:     # no registered sat intervals
+                        self.lastStart = None
+
+            if _bad:
+                return self._return_text_response (f'Bad plane/ordinal ({", ".join (map (str, _bad))})', HTTPStatus.BAD_REQUEST)
+
+            return self._return_text_response ('\n'.join (_msgs) or 'OK', HTTPStatus.OK)
+
         def _checkPlaneOrdinal ():
             _hStatus = HTTPStatus.OK
 
@@ -516,95 +658,83 @@ class FlaskQController (JSONArgParse):
 
             self._queue_message (_d, 'start')
 
-        if request.method == 'POST':
-            _pDict = self._get_post_dict ()
-
-            if   action == 'register':
-                if isinstance (_satTuple := _getSatIntParams (_pDict), tuple):
-                    self.satInts[_satTuple] = _pDict
+        # The handlers read and update satInts (cf., _monitor_nodes ())
 
-                    # When all satellite intervals are registered, publish 'start'
+        with self._satLock:
+            if request.method == 'POST':
+                _pDict = self._get_post_dict ()
 
-                    if len (self.satInts) == self.totSatInts:
-                        _queueStart ()
+                # A satellite interval or a batch of them (JSON array)
 
-                    return self._return_text_response ('OK', HTTPStatus.OK)
+                if   action == 'register':
+                    return _handleRegister   (_pList if (_pList := self._get_post_list ()) is not None else [_pDict])
 
-                return self._return_text_response (f'Bad plane/ordinal ({_pDict})', HTTPStatus.BAD_REQUEST)
+                elif action == 'unregister':
+                    return _handleUnregister (_pList if (_pList := self._get_post_list ()) is not None else [_pDict])
 
-            elif action == 'unregister':
-                if isinstance (_satTuple := _getSatIntParams (_pDict), tuple):
-                    if _satTuple in self.satInts:
-                        del self.satInts[_satTuple]
-                        if len (self.satInts) == 0:     # no registered sat intervals
-                            self.lastStart = None
-
-                        return self._return_text_response ('OK', HTTPStatus.OK)
-                    else:
-                        return self._return_text_response (f'WARNING: unknown satellite interval ({_pDict})', HTTPStatus.OK)
+                elif action == 'stop':
+                    return _handleStop ()
 
-                return self._return_text_response (f'Bad plane/ordinal ({_pDict})', HTTPStatus.BAD_REQUEST)
+                elif action == 'debug':
 
-            elif action == 'stop':
-                return _handleStop ()
+                    # If any satellite intervals are registered, publish 'debug'
 
-            elif action == 'debug':
+                    if len (self.satInts):
 
-                # If any satellite intervals are registered, publish 'debug'
+                        # Validate optional plane and ordinal
 
-                if len (self.satInts):
+                        if (_hStatus := _checkPlaneOrdinal ()) != HTTPStatus.OK:
+                            return self._return_text_response (f'Bad plane/ordinal ({_pDict})', _hStatus)
 
-                    # Validate optional plane and ordinal
+                        # Publish 'debug'
 
-                    if (_hStatus := _checkPlaneOrdinal ()) != HTTPStatus.OK:
-                        return self._return_text_response (f'Bad plane/ordinal ({_pDict})', _hStatus)
+                        self._queue_message (_pDict, 'debug')
+                        return self._return_text_response ('OK', HTTPStatus.OK)
+                    else:
+                        return self._return_text_response ('WARNING: no satellite intervals are registered.',
+                                                           HTTPStatus.OK)
 
-                    # Publish 'debug'
+                elif action == 'exfilt':
 
-                    self._queue_message (_pDict, 'debug')
-                    return self._return_text_response ('OK', HTTPStatus.OK)
-                else:
-                    return self._return_text_response ('WARNING: no satellite intervals are registered.',
-                                                       HTTPStatus.OK)
+                    # If any satellite intervals are registered, publish 'exfilt'
 
-            elif action == 'exfilt':
+                    if len (self.satInts):
 
-                # If any satellite intervals are registered, publish 'exfilt'
+                        # Validate optional plane and ordinal
 
-                if len (self.satInts):
+                        if (_hStatus := _checkPlaneOrdinal ()) != HTTPStatus.OK:
+                            return self._return_text_response (f'Bad plane/ordinal ({_pDict})', _hStatus)
 
-                    # Validate optional plane and ordinal
+                        # Publish 'exfilt'
 
-                    if (_hStatus := _checkPlaneOrdinal ()) != HTTPStatus.OK:
-                        return self._return_text_response (f'Bad plane/ordinal ({_pDict})', _hStatus)
-
-                    # Publish 'exfilt'
+                        self._queue_message (_pDict, 'exfilt')
+                        return self._return_text_response ('OK', HTTPStatus.OK)
+                    else:
+                        return self._return_text_response ('WARNING: no satellite intervals are registered.',
+                                                           HTTPStatus.OK)
 
-                    self._queue_message (_pDict, 'exfilt')
-                    return self._return_text_response ('OK', HTTPStatus.OK)
-                else:
-                    return self._return_text_response ('WARNING: no satellite intervals are registered.',
-                                                       HTTPStatus.OK)
+                elif action == 'thirdParty':
+                    return _handle3rdParty ()
 
-            elif action == 'thirdParty':
-                return _handle3rdParty ()
+                elif action == 'shard':
+                    return _handleShard ()
 
-        elif request.method == 'GET':
-            if   action == 'stop':
-                _pdict = dict ()
-                return _handleStop ()
+            elif request.method == 'GET':
+                if   action == 'stop':
+                    _pdict = dict ()
+                    return _handleStop ()
 
-            elif action == 'thirdParty':
-                _pdict = dict ()
-                return _handle3rdParty ()
+                elif action == 'thirdParty':
+                    _pdict = dict ()
+                    return _handle3rdParty ()
 
-            elif action == 'info':
-                return _handleInfo ()
+                elif action == 'info':
+                    return _handleInfo ()
 
-            elif action == '_start':
-                _queueStart ()
+                elif action == '_start':
+                    _queueStart ()
             
-                return self._return_text_response (f'# sat ints: {len (self.satInts)}', HTTPStatus.OK)
+                    return self._return_text_response (f'# sat ints: {len (self.satInts)}', HTTPStatus.OK)
 
         return self._return_text_response (f'ERROR: unknown "/nodes/" endpoint ("{action}")',
                                            HTTPStatus.BAD_REQUEST)
@@ -642,7 +772,13 @@ class FlaskQController (JSONArgParse):
         # Per https://stackoverflow.com/questions/67340101/generating-flask-route-from-class-method
         # because @app.route () decorators don't work for class or instance methods.
 
-        self.flask.route ('/nodes/<action>',     # POST: 'register', 'unregister', 'stop', 'debug', 'exfilt', 'thirdParty'; GET: 'stop', 'thirdParty', 'info', '_start'
+        # Drop sharding nodes that stopped sending heartbeats
+
+        Thread (target = self._monitor_nodes,
+                name   = 'Sharding node monitor',
+                daemon = True).start ()
+
+        self.flask.route ('/nodes/<action>',     # POST: 'register', 'unregister', 'stop', 'debug', 'exfilt', 'thirdParty', 'shard'; GET: 'stop', 'thirdParty', 'info', '_start'
                           methods=['POST', 'GET']) (self._nodes_action)
         self.flask.route ('/eval',
                           methods=['POST'])        (self._eval)
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 from enum import Enum, auto
+import math
 import pickle
+import struct
 
 from zmq.utils import jsonapi
 
@@ -17,25 +19,108 @@ class ZmqPPWrapperType (__AutoName):
         self.lower       = self.name.lower ()
         self.description = description
 
-    BYTES = auto (),
-    STR   = auto (),
-    JSON  = auto (),
-    PYOBJ = auto ()
+    BYTES     = auto (),
+    STR       = auto (),
+    JSON      = auto (),
+    PYOBJ     = auto (),
+    POSITION  = auto (),    # one position record (cf., POSITION_CODEC)
+    POSITIONS = auto (),    # list of position records, packed back to back
 
 del __AutoName
 
+
+class StructCodec:
+    """
+    Schema-driven, fixed-layout (little-endian struct) codec for dict
+    records.  fields: ordered (<name>, <struct format character>) tuples;
+    enums: <name>: tuple of the field's str values, packed as their index
+    (index 0 is the absent value; other values raise ValueError); derive:
+    optional function that adds redundant fields to a decoded record.
+    """
+
+    def __init__ (self, fields: tuple, enums: dict = None, derive = None):
+        self._fields = tuple (fields)
+        self._struct = struct.Struct ('<' + ''.join ([_fmt for _, _fmt in self._fields]))
+        self._enums  = dict (enums) if enums else dict ()
+        self._index  = {_name: {_value: _i for _i, _value in enumerate (_values)} for _name, _values in self._enums.items ()}
+        self._derive = derive
+        self.size    = self._struct.size
+
+    def _values (self, _rec: dict):
+        _values = list ()
+        for _name, _fmt in self._fields:
+            _value = _rec.get (_name)
+            if _name in self._index:
+                if (_value := self._index[_name].get (_value)) is None:
+                    raise ValueError (f'{_name}: not one of {self._enums[_name]} ({_rec.get (_name)!r})')
+            elif _value is None:
+                _value = math.nan if _fmt in 'efd' else 0
+            _values.append (_value)
+        return _values
+
+    def _record (self, _values) -> dict:
+        _rec = dict ()
+        for (_name, _), _value in zip (self._fields, _values):
+            if _name in self._enums:
+                if not _value:
+                    continue
+                _value = self._enums[_name][_value]
+            _rec[_name] = _value
+        if self._derive:
+            self._derive (_rec)
+        return _rec
+
+    def encode (self, _rec: dict) -> bytes:
+        return self._struct.pack (*self._values (_rec))
+
+    def decode (self, _buf) -> dict:
+        return self._record (self._struct.unpack (_buf))
+
+    def encodeMany (self, _recs) -> bytearray:
+        _buf = bytearray (self.size * len (_recs))
+        for _i, _rec in enumerate (_recs):
+            self._struct.pack_into (_buf, _i * self.size, *self._values (_rec))
+        return _buf
+
+    def decodeMany (self, _buf) -> list:
+        return [self._record (_values) for _values in self._struct.iter_unpack (_buf)]
+
+
+# Satellite position record (cf., OrbitApp._pubGeo ()): 69 bytes vs. ~220 as JSON
+
+def _positionLabel (_rec: dict):
+    _rec['label'] = f"leosat-{_rec['plane']:02d}-{_rec['ordinal']:02d}"
+
+POSITION_CODEC = StructCodec ((('plane',    'H'),
+                               ('ordinal',  'H'),
+                               ('lat',      'd'),
+                               ('lon',      'd'),
+                               ('alt',      'd'),
+                               ('delx',     'd'),
+                               ('dely',     'd'),
+                               ('delz',     'd'),
+                               ('time',     'd'),
+                               ('interval', 'd'),
+                               ('color',    'B')),
+                              enums  = {'color': (None, 'bg-green-500', 'bg-pink-500', 'bg-yellow-500', 'bg-red-500')},
+                              derive = _positionLabel)
+
 _ZmqPPEncoders = {
-    ZmqPPWrapperType.BYTES: lambda _msg: _msg,
-    ZmqPPWrapperType.STR:   lambda _str: _str.encode ('utf-8'),
-    ZmqPPWrapperType.JSON:  jsonapi.dumps,
-    ZmqPPWrapperType.PYOBJ: lambda _obj: pickle.dumps (_obj, -1)
+    ZmqPPWrapperType.BYTES:     lambda _msg: _msg,
+    ZmqPPWrapperType.STR:       lambda _str: _str.encode ('utf-8'),
+    ZmqPPWrapperType.JSON:      jsonapi.dumps,
+    ZmqPPWrapperType.PYOBJ:     lambda _obj: pickle.dumps (_obj, -1),
+    ZmqPPWrapperType.POSITION:  POSITION_CODEC.encode,
+    ZmqPPWrapperType.POSITIONS: POSITION_CODEC.encodeMany
 }
 
 _ZmqPPDecoders = {
-    ZmqPPWrapperType.BYTES: lambda _msg: _msg,
-    ZmqPPWrapperType.STR:   lambda _msg: _msg.decode ('utf-8'),
-    ZmqPPWrapperType.JSON:  jsonapi.loads,
-    ZmqPPWrapperType.PYOBJ: pickle.loads
+    ZmqPPWrapperType.BYTES:     lambda _msg: _msg,
+    ZmqPPWrapperType.STR:       lambda _msg: _msg.decode ('utf-8'),
+    ZmqPPWrapperType.JSON:      jsonapi.loads,
+    ZmqPPWrapperType.PYOBJ:     pickle.loads,
+    ZmqPPWrapperType.POSITION:  POSITION_CODEC.decode,
+    ZmqPPWrapperType.POSITIONS: POSITION_CODEC.decodeMany
 }
 
 def ZmqPPEncoderFor (zmqEncoderType: ZmqPPWrapperType):
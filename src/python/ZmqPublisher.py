@@ -16,11 +16,13 @@
 #
 ###############################################################################
 
+from collections import deque
 import logging
 from threading import Thread, Condition
 import time
 
 import zmq
+from zmq.utils.monitor import recv_monitor_message
 
 from ZmqPPWrapper import ZmqPPWrapperType, ZmqPPEncoderFor
 
@@ -32,6 +34,9 @@ class ZmqPublisher:
     """
 
     CONNECT_DELAY = 1.0 # time to wait after connect/bind (in seconds)
+    READY_TIMEOUT = 10.0 # default max time to wait for readiness (in seconds)
+    PUBLISH_BATCH = 256 # queued messages taken per run() drain
+    QUEUE_POLICIES = ('block', 'drop')
 
     def __init__(self,
                  context,
@@ -39,7 +44,12 @@ class ZmqPublisher:
                  topic='',
                  zmqEncoderType: ZmqPPWrapperType = ZmqPPWrapperType.BYTES,
                  invertConnection=False,
-                 high_water_mark=None):
+                 high_water_mark=None,
+                 queue_hwm=0,
+                 queue_policy='block',
+                 urgent_topics=(),
+                 subscribers=None,
+                 ready_timeout=None):
         """
         Args:
 
@@ -61,6 +71,30 @@ class ZmqPublisher:
 
             high_water_mark[int] (Optional): max number of messages
                 that can be queued on this publisher.
+
+            queue_hwm[int] (Optional): max number of messages queued
+                for asynchronous publication (see queue_message());
+                default: 0 (unbounded).
+
+            queue_policy[str] (Optional): when queue_hwm messages are
+                queued, 'block' (wait for room) or 'drop' (discard the
+                oldest queued message); default: 'block'.
+
+            urgent_topics[iterable of bytes or str] (Optional): topics
+                queued on the urgent lane, which is published ahead of
+                (and between) bulk messages and is exempt from
+                queue_hwm; default: none.
+
+            subscribers[int] (Optional): readiness mode.  None: sleep
+                CONNECT_DELAY after bind/connect (default).  0: return
+                as soon as the socket is usable (when connecting, once
+                the connection is established).  N > 0: also wait for
+                N subscriptions (an XPUB socket) so that the first
+                messages published reach them; publishMsg() keeps
+                counting them (cf., subscriptions).
+
+            ready_timeout[float] (Optional): max seconds to wait for
+                readiness; default: READY_TIMEOUT.
         """
         self.__logger = logging.getLogger(__name__)
         self.__logger.info("Starting ZmqPublisher")
@@ -71,7 +105,12 @@ class ZmqPublisher:
             self.__logger.debug("Creating new ZeroMQ context")
             context = zmq.Context()
 
-        self.socket = context.socket(zmq.PUB)  # @UndefinedVariable
+        # An XPUB socket receives its subscribers' subscriptions (drained by publishMsg())
+        self._xpub         = bool (subscribers)
+        self.subscriptions = 0          # XPUB: current subscriptions
+        self.socket = context.socket(zmq.XPUB if self._xpub else zmq.PUB)  # @UndefinedVariable
+        if self._xpub:
+            self.socket.setsockopt(zmq.XPUB_VERBOSER, 1)  # report every (even duplicate) subscription and unsubscription
 
         if high_water_mark:
             self.socket.set_hwm(high_water_mark)
@@ -87,19 +126,88 @@ class ZmqPublisher:
             self.__logger.debug("Binding to socket: %s" % socketAddr)
             self.socket.bind(socketAddr)
         else:
+            _monitor = self.socket.get_monitor_socket(zmq.EVENT_CONNECTED) if subscribers == 0 else None
             self.__logger.debug("Connecting to socket: %s" % socketAddr)
             self.socket.connect(socketAddr)
 
         self.zmqType    = zmqEncoderType
         self.zmqEncoder = ZmqPPEncoderFor (zmqEncoderType)
 
-        # wait for socket bind/connect to complete
-        time.sleep(self.CONNECT_DELAY)
+        _deadline = time.monotonic () + (self.READY_TIMEOUT if ready_timeout is None else ready_timeout)
+
+        if subscribers is None:
+            # wait for socket bind/connect to complete
+            time.sleep(self.CONNECT_DELAY)
+
+        elif subscribers:
+            self._wait_subscribers (subscribers, _deadline)
+
+        elif invertConnection is not False:
+            self._wait_connected (_monitor, _deadline)
 
         self.topic = self._convert_to_bytes (topic)
 
-        self._zmq_queue = list ()       # Tuples: (<topic>, b<string JSON object>)
-        self._zmq_qlock = Condition ()
+        if queue_policy not in self.QUEUE_POLICIES:
+            raise ValueError(f'invalid queue policy ("{queue_policy}")')
+
+        self._zmq_queue    = deque ()       # Bulk lane tuples: (<topic>, <message>, <queued at (time.monotonic ())>)
+        self._zmq_urgent   = deque ()       # Urgent lane (same as above)
+        self._zmq_qlock    = Condition ()
+        self._queue_hwm    = queue_hwm
+        self._queue_policy = queue_policy
+        self._urgentTopics = frozenset (self._convert_to_bytes (_topic) for _topic in urgent_topics)
+
+        # Counters (cf., stats())
+
+        self._queued    = 0
+        self._published = 0
+        self._dropped   = 0
+        self._maxDepth  = 0
+        self._sumLate   = 0.0           # seconds from queue_message() to publication
+        self._maxLate   = 0.0
+        self._urgent    = 0             # urgent lane: published and max latency
+        self._maxUrgent = 0.0
+
+    def _wait_subscribers (self, subscribers, deadline):
+        """
+        Wait (until deadline) for subscribers XPUB subscription messages.
+        """
+        while self.subscriptions < subscribers:
+            if (_wait := deadline - time.monotonic ()) <= 0 or \
+               not self.socket.poll(int (_wait * 1000.0), zmq.POLLIN):
+                self.__logger.warning(f"{self.subscriptions} of {subscribers} subscribers after readiness timeout")
+                return
+
+            self._drain_subscriptions ()
+
+        self.__logger.debug(f"{self.subscriptions} subscribers ready")
+
+    def _drain_subscriptions (self):
+        """
+        Read the XPUB (un)subscription messages received so far (lest
+        they accumulate in the socket) and count the subscriptions.
+        """
+        while self.socket.get(zmq.EVENTS) & zmq.POLLIN:
+            _frame = self.socket.recv()
+            if _frame[:1] == b'\x01':
+                self.subscriptions += 1
+            elif _frame[:1] == b'\x00':
+                self.subscriptions -= 1
+
+    def _wait_connected (self, monitor, deadline):
+        """
+        Wait (until deadline) for the connection's monitor event.
+        """
+        try:
+            while (_wait := deadline - time.monotonic ()) > 0:
+                if monitor.poll(int (_wait * 1000.0), zmq.POLLIN) and \
+                   recv_monitor_message(monitor)['event'] == zmq.EVENT_CONNECTED:
+                    return
+
+            self.__logger.warning("not connected after readiness timeout")
+        finally:
+            self.socket.disable_monitor()
+            monitor.close()
 
     def _convert_to_bytes (self, arg):
         return arg if isinstance (arg, bytes) else bytes (arg, 'utf-8')
@@ -121,17 +229,41 @@ class ZmqPublisher:
             self.socket.close()
             self.socket = None
 
-    def queue_message (self, msg, topic=None):
+        # release the publication thread and blocked queue_message() callers
+        with self._zmq_qlock:
+            self._zmq_qlock.notify_all ()
+
+    def queue_message (self, msg, topic=None, urgent=None):
         """
         Queue message for asynchronous publication.
         Args:
             msg: outgoing message of type zmqEncoderType.
             topic[bytes or str] (Optional): message-specific topic
+            urgent[bool] (Optional): queue on the urgent (True) or bulk
+                (False) lane; default: by topic (cf., urgent_topics)
         """
         if self.socket:
+            if urgent is None:
+                urgent = self._convert_to_bytes (topic if topic else self.topic) in self._urgentTopics
+
             with self._zmq_qlock:
-                self._zmq_queue.append ((topic, msg))
-                self._zmq_qlock.notify ()
+                if urgent:
+                    self._zmq_urgent.append ((topic, msg, time.monotonic ()))
+                    self._queued += 1
+                    self._zmq_qlock.notify_all ()
+                    return
+
+                if self._queue_hwm and len (self._zmq_queue) >= self._queue_hwm:
+                    if self._queue_policy == 'drop':
+                        self._zmq_queue.popleft ()
+                        self._dropped += 1
+                    else:
+                        self._zmq_qlock.wait_for (lambda: len (self._zmq_queue) < self._queue_hwm or not self.socket)
+
+                self._zmq_queue.append ((topic, msg, time.monotonic ()))
+                self._queued  += 1
+                self._maxDepth = max (self._maxDepth, len (self._zmq_queue))
+                self._zmq_qlock.notify_all ()
 
     def run (self, threadName=None):
         """
@@ -141,13 +273,44 @@ class ZmqPublisher:
         """
         if self.socket:
 
+            def _publish (_entry, _urgent):
+                _topic, _msg, _queued = _entry
+                self.publishMsg (_msg, _topic)
+
+                _late = time.monotonic () - _queued
+                with self._zmq_qlock:
+                    self._published += 1
+                    self._sumLate   += _late
+                    self._maxLate    = max (self._maxLate, _late)
+                    if _urgent:
+                        self._urgent   += 1
+                        self._maxUrgent = max (self._maxUrgent, _late)
+
+            def _publish_urgent ():
+                while self._zmq_urgent:     # (unlocked peek; only this thread pops)
+                    with self._zmq_qlock:
+                        _entry = self._zmq_urgent.popleft ()
+                    _publish (_entry, True)
+
             def _zmq_publish ():
                 while self.socket:
+
+                    # Take a batch of queued messages, waiting only when there are none
+
                     with self._zmq_qlock:
-                        self._zmq_qlock.wait ()
-                        while self._zmq_queue:
-                            _topic, _msg = self._zmq_queue.pop (0)
-                            self.publishMsg (_msg, _topic)
+                        while not self._zmq_queue and not self._zmq_urgent and self.socket:
+                            self._zmq_qlock.wait ()
+
+                        _batch = [self._zmq_queue.popleft () for _ in range (min (len (self._zmq_queue), self.PUBLISH_BATCH))]
+                        self._zmq_qlock.notify_all ()       # room for blocked queue_message() callers
+
+                    # Publish without holding the queue lock; urgent messages go
+                    # first and preempt the bulk batch between messages
+
+                    _publish_urgent ()
+                    for _entry in _batch:
+                        _publish (_entry, False)
+                        _publish_urgent ()
 
             _thread = Thread (target = _zmq_publish,
                               name   = threadName if threadName else 'ZMQ Msg Publication',
@@ -155,6 +318,25 @@ class ZmqPublisher:
                               daemon = True)
             _thread.start ()
 
+    def stats (self) -> dict:
+        """
+        Return the asynchronous publication counters: messages queued,
+        published, and dropped; the current and maximum (bulk) queue
+        depth; the mean and maximum publication latency (seconds from
+        queue_message()); and the urgent lane's published count and
+        maximum latency.
+        """
+        with self._zmq_qlock:
+            return {'queued':    self._queued,
+                    'published': self._published,
+                    'dropped':   self._dropped,
+                    'depth':     len (self._zmq_queue) + len (self._zmq_urgent),
+                    'maxDepth':  self._maxDepth,
+                    'meanLate':  self._sumLate / self._published if self._published else 0.0,
+                    'maxLate':   self._maxLate,
+                    'urgent':    self._urgent,
+                    'maxUrgent': self._maxUrgent}
+
     def publishMsg (self, msg, topic=None):
         """
         Publish a single message on this publisher's topic.
@@ -163,4 +345,8 @@ class ZmqPublisher:
             topic[bytes or str] (Optional): message-specific topic
         """
         if self.socket:
-            self.socket.send_multipart ([self._convert_to_bytes (topic) if topic else self.topic, self.zmqEncoder (msg)])
+            if self._xpub:
+                self._drain_subscriptions ()
+
+            # zero-copy: frames below the socket's copy_threshold are copied anyway
+            self.socket.send_multipart ([self._convert_to_bytes (topic) if topic else self.topic, self.zmqEncoder (msg)], copy=False)
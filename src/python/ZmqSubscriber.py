@@ -16,12 +16,16 @@
 #
 ###############################################################################
 
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import inspect
 import logging
+from threading import Lock
 import traceback
 
 import zmq
-from zmq.eventloop import ioloop, zmqstream
+import zmq.asyncio
 
 from ZmqPPWrapper import ZmqPPWrapperType, ZmqPPDecoderFor
 
@@ -30,9 +34,12 @@ class ZmqSubscriber(object):
     ZeroMQ message subscriber.
     """           
 
+    RECV_BATCH = 256    # max messages received per event loop wakeup
+
     def __init__(self, context, socketAddr, topicFilter, callbackFunc, 
                  zmqDecoderType: ZmqPPWrapperType = ZmqPPWrapperType.BYTES,
-                 invertConnection=False, highWaterMark=None, readyEvent = None):
+                 invertConnection=False, highWaterMark=None, readyEvent = None,
+                 workers=None, maxPending=None, ordered=False):
         """Args:
 
             context (Optional): ZeroMQ Context object. If 'None', a
@@ -71,6 +78,19 @@ class ZmqSubscriber(object):
                 published events. This can be used to coordinate
                 threads that can only be started after this subscriber
                 is fully ready.
+
+            workers[int] (Optional): if set, invoke callbackFunc on a
+                pool of this many threads rather than on the event
+                loop's; a topic's messages are still handled one at a
+                time, in arrival order.
+
+            maxPending[int] (Optional): with workers, max number of
+                received messages awaiting their callbacks before
+                reception pauses; default: workers * RECV_BATCH.
+
+            ordered[bool] (Optional): with workers, handle all topics'
+                messages one at a time, in arrival order (rather than
+                each topic's in order, concurrently).
         """
         self.__logger = logging.getLogger(__name__)
         self.__logger.debug("Starting ZmqSubscriber")
@@ -82,7 +102,9 @@ class ZmqSubscriber(object):
 
         if context is None:
             self.__logger.debug("Creating new ZeroMQ context")
-            context = zmq.Context()
+            context = zmq.asyncio.Context()
+        elif not isinstance(context, zmq.asyncio.Context):
+            context = zmq.asyncio.Context.shadow(context.underlying)
                         
         self.socket = context.socket(zmq.SUB)  # @UndefinedVariable             
         self.socket.setsockopt(zmq.LINGER, 0)  # @UndefinedVariable
@@ -119,9 +141,17 @@ class ZmqSubscriber(object):
         self.zmqType    = zmqDecoderType
         self.zmqDecoder = ZmqPPDecoderFor (zmqDecoderType)
 
-        self.ioloop = ioloop.ZMQIOLoop()
-        stream = zmqstream.ZMQStream(self.socket, self.ioloop)
-        stream.on_recv(self.__onRecv)
+        # Optional callback worker pool (cf., __dispatch())
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ZMQ callback') if workers else None
+        self._maxPend  = (maxPending if maxPending else workers * self.RECV_BATCH) if workers else None
+        self._pending  = None           # asyncio.Semaphore (of _maxPend); created by __receive()
+        self._ordered  = ordered        # one queue (key: None) for all topics
+        self._topics   = dict ()       # key: topic with a running callback, val: deque of its queued frames
+        self._tLock    = Lock ()
+
+        self._loop       = None         # populated by run()
+        self._task       = None
+        self._terminated = False
 
     def __enter__(self):
         return self
@@ -144,21 +174,74 @@ class ZmqSubscriber(object):
         if self.readyEvent is not None:
             self.readyEvent.set()
 
-        self.ioloop.start()  # block until terminate()
-                
-        #terminate() has been called
-    
-        # release the IOLoop resources
         try:
-            self.ioloop.close()            
-        except: 
-            pass # ignore errors
-        finally:
-            self.ioloop = None
+            asyncio.run(self.__receive())  # block until terminate()
+        except asyncio.CancelledError:
+            pass
+
+        #terminate() has been called
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
 
         # close the server socket. This will interrupt blocking receive
         if self.socket and not self.socket.closed:            
             self.socket.close()        
+
+    async def __receive(self):
+        # (_task before _loop: terminate() cancels _task once _loop is set)
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        if self._terminated:
+            return
+
+        if self._executor:
+            self._pending = asyncio.Semaphore(self._maxPend)
+
+        while True:
+            # wait for a message, then take those already queued (up to RECV_BATCH)
+            _batch = [await self.socket.recv_multipart()]
+            while len(_batch) < self.RECV_BATCH and self.socket.get(zmq.EVENTS) & zmq.POLLIN:
+                _batch.append(await self.socket.recv_multipart())
+
+            for _frames in _batch:
+                await self.__dispatch(_frames)
+
+    async def __dispatch(self, frames):
+        if self._executor is None:
+            self.__onRecv(frames)
+            return
+
+        # A topic's (ordered: every topic's) messages are handled in order, by one worker at a time
+
+        _key = None if self._ordered else frames[0]
+
+        await self._pending.acquire()    # (pauses reception, not the event loop, when maxPending callbacks are pending)
+        with self._tLock:
+            if (_queued := self._topics.get(_key)) is not None:
+                _queued.append(frames)
+                return
+            self._topics[_key] = deque ()
+
+        self._executor.submit(self.__runTopic, _key, frames)
+
+    def __runTopic(self, key, frames):
+        while True:
+            self.__onRecv(frames)
+            self.__release()
+
+            with self._tLock:
+                if not (_queued := self._topics[key]):
+                    del self._topics[key]
+                    return
+                frames = _queued.popleft()
+
+    def __release(self):
+        # (asyncio.Semaphore is not thread-safe)
+        try:
+            self._loop.call_soon_threadsafe(self._pending.release)
+        except RuntimeError:
+            pass # loop closed (terminated)
         
     def terminate(self):
         """
@@ -166,8 +249,12 @@ class ZmqSubscriber(object):
         again after this method has been called.
         """
         self.__logger.info("Cleaning up ZmqSubscriber resources")
-        if self.ioloop:            
-            self.ioloop.add_callback(lambda x: x.stop(), self.ioloop)      
+        self._terminated = True
+        if (_loop := self._loop) is not None and (_task := self._task) is not None and not _loop.is_closed():
+            try:
+                _loop.call_soon_threadsafe(_task.cancel)
+            except RuntimeError:
+                pass # loop closed meanwhile
         
     def __onRecv(self, frames):
         try:
@@ -1,28 +1,43 @@
 #!/usr/bin/env python3
 
 import csv      # .writer () SatApp._DebugFunc ()
+import multiprocessing  # .get_context ()
 import os       # .getenv (), .path.join ()
 import sys      # .exit ()
-from   threading import Thread, Event
+from   threading import Thread, Condition, Event, Lock
 import time     # .time (), .sleep ()
 from   typing import override
 
-import requests
-
 import ZmqSubscriber
 from   ZmqPPWrapper import ZmqPPWrapperType
 
-from   jsonArgParse import rangeType, httpEndpoint, satAppArgs
+from   jsonArgParse import rangeType, httpEndpoint, minIntType, satAppArgs, shardRanges
+from   httpPool     import HttpPool
 from   orbitApp     import OrbitApp
+from   orbitTrace   import TRACE_DTYPE, isColumnar, saveTraces
 
 
 class ConstellationApp (OrbitApp):
+    NODE_HEARTBEAT = 5.0        # seconds between a sharding node's Q controller heartbeats (cf., QController.NODE_TIMEOUT)
+    REGISTER_BATCH = 1000       # satellite intervals per Q controller (un)registration request
 
     def __init__ (self):
         super ().__init__ ()
         self._q_endpoint = None         # populated by setup () and referenced by startOrbit ()
         self._zmq_start  = Event ()     # accessed by startThreads () and provisionally set by _zmqSubCB ()
         self._debug_cap  = os.getenv ('SAT_DEBUG', None) in ('yes', 'enable', 'on', '1')
+        self._shard      = None         # shard process's (or sharding node's) satellites, [(iPlane, iSat)]; cf., _runShard ()
+        self._shardQueue = None         # shard process's ZMQ messages forwarded by the parent process
+        self._shardLock  = Lock ()      # mutex for the sharding node's _shard, _shardEpoch, and _target
+        self._shardEpoch = 0.0          # sharding node's current assignment (cf., _applyShard ())
+        self._target     = None         # orbit stream target; set by startOrbit ()
+        self._shardStop  = set ()       # sharding node's stopped satellites, (iPlane, iSat), never restarted
+        self._nStreams   = dict ()      # live orbit streams; key: (iPlane, iSat, interval), val: count (> 1 when handed back)
+        self._nodeJoined = Event ()     # sharding node's first assignment received
+        self._nodeDone   = Event ()     # sharding node's constellation stopped
+        self._unregC     = Condition () # guards _unregs and _unregBusy
+        self._unregs     = list ()      # stopped satellite intervals awaiting unregistration (cf., _unregister ())
+        self._unregBusy  = False        # an unregistration batch is being posted
 
     @override
     def cliArgParser (self):
@@ -31,6 +46,12 @@ class ConstellationApp (OrbitApp):
         _cliParser.add_argument ('--exfilt-endpoint',
                                  type = httpEndpoint,
                                  help = 'Exfiltration POST endpoint (example: "http://10.100.222.111:24519/exfilt")')
+        _cliParser.add_argument ('--shards',
+                                 type    = minIntType,
+                                 default = 0,
+                                 help    = 'worker processes among which the satellites are partitioned, each running its own orbits and HTTP sinks (0: run in this process; default: %(default)s)')
+        _cliParser.add_argument ('--shard-node',
+                                 help    = 'unique name of this instance among the nodes sharing the constellation, whose satellites are assigned (and rebalanced) by the Q controller (default: none, all satellites)')
         return _cliParser
 
     class _DebugFunc:
@@ -52,6 +73,7 @@ class ConstellationApp (OrbitApp):
 
         def __init__ (self, _outerObj, _geoKey: tuple):
             self._real_time = _outerObj._args.real_time
+            self._records   = None      # columnar formats' buffered rows; cf., _close ()
 
             _fName = _outerObj._args.format.replace ('{plane}',      str (_geoKey[0]))   \
                                            .replace ('{ordinal}',    str (_geoKey[1]))   \
@@ -59,11 +81,21 @@ class ConstellationApp (OrbitApp):
                                            .replace ('{num-sats}',   str (_outerObj._args.num_sats)) \
                                            .replace ('{num-planes}', str (_outerObj._args.num_planes))
 
+            if isColumnar (_fName):
+                self._fName   = _fName
+                self._records = list ()
+                self._fOut    = None
+                self._csvOut  = None
+                return
+
             self._fOut   = open (_fName, 'w', newline = '')
             self._csvOut = csv.writer (self._fOut)
 
         def _writeRow (self, _geoDict):
-            if self._csvOut:    # _close () check
+            if self._records is not None:
+                self._records.append (tuple ([_geoDict.get (_name) for _name in TRACE_DTYPE.names]))
+
+            elif self._csvOut:  # _close () check
                 _row = list ([_geoDict.get ('plane'), _geoDict.get ('ordinal')])
                 if self._real_time:
                     _row += [time.time ()]
@@ -73,21 +105,23 @@ class ConstellationApp (OrbitApp):
                 self._csvOut.writerow (_row)
 
         def _close (self):
+            if self._records is not None:
+                try:
+                    saveTraces (self._fName, self._records)
+                except Exception as _e:
+                    print (f'ERROR: {self._fName}: {_e}')
+                self._records = None
+
             self._csvOut = None         # disable _writeRow ()
-            self._fOut.close ()
+            if self._fOut:
+                self._fOut.close ()
 
     def _exfiltrate (self, _outer, _dict: dict):
         if _ep := _outer._args.exfilt_endpoint:
             try:
-                _resp = requests.post (_ep, json = _dict)
+                HttpPool.submit (_ep, (_dict.get ('plane'), _dict.get ('ordinal'), _dict.get ('interval')), _dict)
             except Exception as _e:
                 print (f'ERROR: {_dict}: {_e}')
-                return
-
-            try:
-                _resp.raise_for_status ()
-            except Exception as _e:
-                print (f'ERROR: {_dict}: {_e} {_resp.json ()}')
 
     def _zmqSubCB (self, _topic, _msg):
 
@@ -114,30 +148,15 @@ class ConstellationApp (OrbitApp):
             else:
                 return (False, )
 
-        def _iteratePlaneOrdinals (_handler):       # caller scope: _msg, _cTuple
-            _enable     = _msg.get ('enable', True)
+        def _planeOrdinals ():                      # caller scope: _cTuple
             _planeRange = _cTuple[1] if _cTuple[1] else (1, self._args.num_planes)
             _satRange   = _cTuple[2] if _cTuple[2] else (1, self._args.num_sats)
             for _iPlane in range (_planeRange[0], _planeRange[1] + 1):
                 for _iSat in range (_satRange[0], _satRange[1] + 1):
-                    with self._rLock:
-                        for _orThread in self.threadsWith (_iPlane, _iSat):
-                            _handler (_iPlane, _iSat, _orThread, _enable)
-
-        def _handleDebug (_iPlane: int, _iSat: int, _orThread: Thread, _enable: bool):
-            if   _enable:
-                self._debugFn[_orThread] = self._DebugFunc._writeGeoDict
-            elif _orThread in self._debugFn:
-                del self._debugFn[_orThread]
+                    yield _iPlane, _iSat
 
-        def _handleExfilt (_iPlane: int, _iSat: int, _orThread: Thread, _enable: bool):
-            if   _enable:
-                self._exfiltFn[_orThread] = self._exfiltrate
-            elif _orThread in self._exfiltFn:
-                del self._exfiltFn[_orThread]
-
-        def _handleStop (_iPlane: int, _iSat: int, _orThread: Thread, _enable: bool):
-            self._stopSet.add (_orThread)
+        def _setModes (**_kwargs):                   # caller scope: _cTuple
+            self.setModes (self.satIntervalsIn (_cTuple[1], _cTuple[2]), **_kwargs)
 
         self.debugPrint (_topic, _msg)
 
@@ -157,9 +176,20 @@ class ConstellationApp (OrbitApp):
 
         elif _topic == 'stop':
             if (_cTuple := _checkPlaneOrdinalClass ()) and _cTuple[0]:
-                _iteratePlaneOrdinals (_handleStop)
 
-                if len (self._threads) == len (self._stopSet):
+                # A sharding node stops with the constellation; its stopped satellites stay stopped when
+                # reassigned (cf., _applyShard ())
+
+                if self._args.shard_node:
+                    if _msg.get ('plane') is None:
+                        self._nodeDone.set ()
+                    else:
+                        with self._shardLock:
+                            self._shardStop.update (_planeOrdinals ())
+
+                self.stopSatIntervals (self.satIntervalsIn (_cTuple[1], _cTuple[2]))
+
+                if not self.streaming ():
                     self._DebugFunc._closeWrites ()
                     if not self._zmq_start.is_set ():
                         self._zmq_start.set ()
@@ -170,77 +200,245 @@ class ConstellationApp (OrbitApp):
 
         elif _topic == 'debug':
             if self._debug_cap and (_cTuple := _checkPlaneOrdinal ()) and _cTuple[0]:
-                _iteratePlaneOrdinals (_handleDebug)
+                _setModes (debugFn = self._DebugFunc._writeGeoDict if _msg.get ('enable', True) else None)
 
         # Enable or disable exfiltration
 
         elif _topic == 'exfilt':
             if (_cTuple := _checkPlaneOrdinal ()) and _cTuple[0]:
-                _iteratePlaneOrdinals (_handleExfilt)
+                _setModes (exfiltFn = self._exfiltrate if _msg.get ('enable', True) else None)
 
-    def _postRequest (self, _action: str, _dSat: dict):
-        return requests.post (os.path.join (self._q_endpoint, _action), json = _dSat)
+        # Sharding nodes' (rebalanced) satellite assignments
 
-    @override
-    def setup (self):
-        self._q_endpoint = self._args.Q_endpoint
+        elif _topic == 'shard':
+            if self._args.shard_node:
+                self._applyShard (_msg.get ('epoch', 0.0), _msg.get ('nodes', dict ()))
+
+    def _postRequest (self, _action: str, _dSat: dict | list):
+        return HttpPool.post (os.path.join (self._q_endpoint, _action), _dSat)
+
+    def _subscribe (self, _callback):
 
         # ZMQ subscription
         _zmqSub = ZmqSubscriber.ZmqSubscriber (None,
                                                self._args.Q_ZMQ_pub,
                                                '',
-                                               self._zmqSubCB,
+                                               _callback,
                                                ZmqPPWrapperType.JSON,
-                                               False)
+                                               False,
+                                               workers = 1,     # off the receiving loop ...
+                                               ordered = True)  # ... in arrival order across topics (e.g., start, stop, start)
         _thread = Thread (target = lambda: _zmqSub.run (),
                           name   = 'ZMQ subscriber',
                           daemon = True)
         _thread.start ()
 
     @override
-    def startOrbit (self, _target, _numPlanes, _numSats):
-        for _j in range (self._args.num_planes):
-            _iPlane = _j + 1
-            for _i in range (self._args.num_sats):
-                _iSat = _i + 1
+    def setup (self):
+        self._q_endpoint = self._args.Q_endpoint
+
+        # A shard process receives its ZMQ messages from the parent process (cf., runShards ())
+
+        if self._shardQueue:
+            Thread (target = lambda: [self._zmqSubCB (*_tMsg) for _tMsg in iter (self._shardQueue.get, None)],
+                    name   = 'Shard messages',
+                    daemon = True).start ()
+        else:
+            self._subscribe (self._zmqSubCB)
+
+        Thread (target = self._unregister,
+                name   = 'Q unregistration',
+                daemon = True).start ()
+
+        # A sharding node joins the Q controller's nodes and awaits its satellite assignment
+
+        if self._args.shard_node:
+            Thread (target = self._heartbeat,
+                    name   = 'Shard node heartbeat',
+                    daemon = True).start ()
+
+            while not self._nodeJoined.wait (2.0):
+                pass
+
+    def _heartbeat (self):
+        """
+        Periodically (re)join the Q controller's sharding nodes, applying
+        the returned assignments (cf., _applyShard ()), until the
+        constellation stops.
+        """
+        _dNode = {'node': self._args.shard_node}
+
+        while not self._nodeDone.is_set ():
+            try:
+                _resp = self._postRequest ('shard', _dNode)
+                _resp.raise_for_status ()
+
+                _dShard = _resp.json ()
+                self._applyShard (_dShard.get ('epoch', 0.0), _dShard.get ('nodes', dict ()))
+                self._nodeJoined.set ()
+            except Exception as _e:
+                self.debugPrint (f'{time.time ()} {_dNode}: {_e}')
+
+            self._nodeDone.wait (self.NODE_HEARTBEAT)
+
+    def _applyShard (self, _epoch: float, _nodes: dict):
+        """
+        Apply a (newer) assignment of satellite index ranges to sharding
+        nodes (key: <node>, val: [<begin>, <end>); cf., shardRanges ()):
+        stop the satellites reassigned elsewhere and start (and register)
+        the ones assigned here.
+        """
+        with self._shardLock:
+            if _epoch <= self._shardEpoch or self._nodeDone.is_set ():
+                return
+
+            self._shardEpoch = _epoch
+
+            _begin, _end = _nodes.get (self._args.shard_node, (0, 0))
+            _shard       = [(_i // self._args.num_sats + 1, _i % self._args.num_sats + 1) for _i in range (_begin, _end)]
+            _shard       = [_planeOrdinal for _planeOrdinal in _shard if _planeOrdinal not in self._shardStop]
+
+            if self._target is None:        # not yet started (cf., startOrbit ())
+                self._shard = _shard
+                return
+
+            _dropped    = set (self._shard).difference (_shard)
+            _added      = [_planeOrdinal for _planeOrdinal in _shard if _planeOrdinal not in self._shard]
+            self._shard = _shard
+
+            print (f'INFO: shard node {self._args.shard_node}: {len (_shard)} satellites ({len (_added)} added, {len (_dropped)} dropped)')
+
+            self.stopSatIntervals ([_satInt for _planeOrdinal in _dropped for _satInt in self.threadsWith (*_planeOrdinal)])
+
+            if _added:
+                self._startSatellites (_added)
+
+    def runShards (self):
+        """
+        Partition the satellites (plane-major) among --shards worker
+        processes, each running its own orbits and HTTP sinks (cf.,
+        _runShard ()), and forward each ZMQ message to the shards whose
+        satellites it may address.
+        """
+        _satellites = [(_iPlane, _iSat) for _iPlane in range (1, self._args.num_planes + 1) for _iSat in range (1, self._args.num_sats + 1)]
+        _shards     = [_satellites[_begin:_end] for _begin, _end in shardRanges (len (_satellites), min (self._args.shards, len (_satellites)))]
+
+        def _addresses (_msg: dict, _shard: list) -> bool:    # cf., _zmqSubCB ()._checkPlaneOrdinal ()
+            _pRange = (1, self._args.num_planes)
+            _sRange = (1, self._args.num_sats)
+            if (_iPlane := _msg.get ('plane')) is not None:
+                _pRange = rangeType (_iPlane, 1, self._args.num_planes, _raise = False)
+                if (_iSat := _msg.get ('ordinal')) is not None:
+                    _sRange = rangeType (_iSat, 1, self._args.num_sats, _raise = False)
+
+            if not _pRange or not _sRange:      # invalid; left to the shards
+                return True
+
+            return any ([_pRange[0] <= _jPlane <= _pRange[1] and _sRange[0] <= _jSat <= _sRange[1] for _jPlane, _jSat in _shard])
+
+        def _forward (_topic, _msg):
+            self.debugPrint (_topic, _msg)
+
+            for _shard, _queue in zip (_shards, _queues):
+                if _topic not in ('stop', 'debug', 'exfilt') or _addresses (_msg, _shard):
+                    _queue.put ((_topic, _msg))
+
+        # Spawn (rather than fork) the shards: this process is multithreaded once subscribed
+
+        _context   = multiprocessing.get_context ('spawn')
+        _queues    = [_context.SimpleQueue () for _ in _shards]
+        _processes = [_context.Process (target = _runShard,
+                                        name   = f'Shard #{_i + 1}',
+                                        args   = (_shard, _queue),
+                                        daemon = True) for _i, (_shard, _queue) in enumerate (zip (_shards, _queues))]
+        for _process in _processes:
+            _process.start ()
+
+        self._subscribe (_forward)
+
+        for _process in _processes:
+            _process.join ()
+
+    def _satIntDict (self, _iPlane: int, _iSat: int, _interval: float) -> dict:
+        _dSat = {'plane': _iPlane, 'ordinal': _iSat, 'interval': _interval}
+        if self._args.shard_node:
+            _dSat['node'] = self._args.shard_node
+
+        return _dSat
+
+    def _registerSatIntervals (self, _satInts: list):
+
+        # Advertise satellite interval starts to Q controller, REGISTER_BATCH at a time
+
+        for _i0 in range (0, len (_satInts), self.REGISTER_BATCH):
+            _dSats = [self._satIntDict (*_key) for _key in _satInts[_i0:_i0 + self.REGISTER_BATCH]]
+
+            while True:
+                try:
+                    _resp = self._postRequest ('register', _dSats)
+                except Exception as _e:
+                    self.debugPrint (f'{time.time ()} {len (_dSats)} satellite intervals: {_e}')
+                    time.sleep (2.0)
+                    continue
+
                 try:
-                    # Iterate over interval dict entries
-    
-                    for _interval, _endpoint in self.epArgs.items ():
-                        _nvargs = {'interval': _interval,
-                                   'endpoint': _endpoint
-                                  }
-                        _thread = Thread (target = _target,
-                                          name   = f'Gen node #{_iSat}',
-                                          args   = (_iPlane, _iSat, _nvargs),
-                                          daemon = True)
-                        with self._rLock:
-                            self._threads[(_iPlane, _iSat, _interval)] = _thread
-    
-                        _thread.start ()
-    
-                        # Advertise satellite interval start to Q controller
-    
-                        _dSat = {'plane': _iPlane, 'ordinal': _iSat, 'interval': _interval}
-    
-                        while True:
-                            try:
-                                _resp = self._postRequest ('register', _dSat)
-                            except Exception as _e:
-                                self.debugPrint (f'{time.time ()} {_dSat}: {_e}')
-                                time.sleep (2.0)
-                                continue
-    
-                            try:
-                                _resp.raise_for_status ()
-                            except Exception as _e:
-                                self.debugPrint (f'{time.time ()} {_dSat}: {_e} {_resp.json ()}')
-    
-                            break
-    
+                    _resp.raise_for_status ()
                 except Exception as _e:
-                    print (f'ERROR: {_e}')
-                    sys.exit (1)
+                    self.debugPrint (f'{time.time ()} {len (_dSats)} satellite intervals: {_e} {_resp.text}')
+
+                break
+
+    def _unregister (self):
+        """
+        Unregister stopped satellite intervals from the Q controller in
+        batches: those stopped while the previous batch was posted.
+        """
+        while True:
+            with self._unregC:
+                while not self._unregs:
+                    self._unregC.wait ()
+
+                _dSats          = self._unregs[:self.REGISTER_BATCH]
+                self._unregs    = self._unregs[self.REGISTER_BATCH:]
+                self._unregBusy = True
+
+            try:
+                _resp = self._postRequest ('unregister', _dSats)
+                _resp.raise_for_status ()
+            except Exception as _e:
+                self.debugPrint (f'{time.time ()} {len (_dSats)} satellite intervals: {_e}')
+
+            with self._unregC:
+                self._unregBusy = False
+                self._unregC.notify_all ()
+
+    def _startSatellites (self, _planeOrdinals: list):     # caller holds self._shardLock
+        _satInts = [(_iPlane, _iSat, _interval) for _iPlane, _iSat in _planeOrdinals
+                                                for _strides in self.cadArgs.values () for _interval in _strides]
+
+        with self._rLock:
+            for _key in _satInts:
+                self._nStreams[_key] = self._nStreams.get (_key, 0) + 1
+
+        self.startSatellites (self._target, _planeOrdinals)
+
+        try:
+            self._registerSatIntervals (_satInts)
+        except Exception as _e:
+            print (f'ERROR: {_e}')
+            sys.exit (1)
+
+    @override
+    def startOrbit (self, _target, _numPlanes, _numSats):
+
+        # Start the (shard's or node's) orbit streams, then register their satellite intervals
+
+        with self._shardLock:
+            self._target = _target
+            if self._shard is None:
+                self._shard = [(_iPlane, _iSat) for _iPlane in range (1, _numPlanes + 1) for _iSat in range (1, _numSats + 1)]
+
+            self._startSatellites (self._shard)
 
     @override
     def startThreads (self, _args):
@@ -250,23 +448,62 @@ class ConstellationApp (OrbitApp):
 
         super ().startThreads (_args)
 
+        # Let stopped streams (including any _applyShard () started meanwhile) unregister their satellite
+        # intervals before exiting
+
+        _joined = set ()
+        while True:
+            with self._rLock:
+                _satInts = [_satInt for _satInt in self._threads.values () if _satInt not in _joined]
+            if not _satInts:
+                break
+
+            for _satInt in _satInts:
+                _satInt.join ()
+                _joined.add (_satInt)
+
+        with self._unregC:
+            if not self._unregC.wait_for (lambda: not self._unregs and not self._unregBusy, self._args.http_timeout):
+                print (f'WARNING: {len (self._unregs)} satellite intervals not unregistered')
+
+    @override
+    def streaming (self) -> bool:
+
+        # A sharding node runs until the constellation stops, though it may (for now) have no satellites
+
+        return not self._nodeDone.is_set () if self._args.shard_node else super ().streaming ()
+
     @override
     def stoppedThread (self, _iPlane: int, _iSat: int, _interval: float):
 
-        # Unregister satellite interval from Q controller
+        # A satellite interval reassigned elsewhere and back again stays registered by its new stream
 
-        _dSat = {'plane': _iPlane, 'ordinal': _iSat, 'interval': _interval}
+        with self._rLock:
+            _key                 = (_iPlane, _iSat, _interval)
+            self._nStreams[_key] = self._nStreams.get (_key, 1) - 1
+            if self._nStreams[_key] > 0:
+                return
 
-        try:
-            _resp = self._postRequest ('unregister', _dSat)
-        except Exception as _e:
-            self.debugPrint (f'{time.time ()} {_dSat}: {_e}')
-            return
+        # Unregister satellite interval from Q controller (batched; cf., _unregister ())
 
-        try:
-            _resp.raise_for_status ()
-        except Exception as _e:
-            self.debugPrint (f'{time.time ()} {_dSat}: {_e} {_resp.json ()}')
+        with self._unregC:
+            self._unregs.append (self._satIntDict (_iPlane, _iSat, _interval))
+            self._unregC.notify_all ()
+
+    @override
+    def run (self):
+        if self._args.shards and self._args.shard_node:
+            print ('ERROR: --shards and --shard-node are exclusive')
+        elif self._args.shards and self._shard is None:
+            self.runShards ()
+        else:
+            super ().run ()
+
+def _runShard (_shard: list, _queue):     # shard process; (re)reads the configuration from the parent's CLI or JSON
+    _constApp = ConstellationApp ()
+    _constApp._shard      = _shard
+    _constApp._shardQueue = _queue
+    _constApp.run ()
 
 if __name__ == '__main__':
     _constApp = ConstellationApp ()
@@ -0,0 +1,160 @@
+# Description
+#
+#   WGS 84 constants, coordinate transformations, and longitude helpers
+#   shared by orbitApp.py and orbitEngine.py.
+#
+#   The batched transformations (llaToECEF (), ecefToLLA ()) accept scalars
+#   or NumPy arrays so that a whole constellation can be transformed with
+#   one call per tick.  Their backend is selected by setGeodesyBackend ():
+#
+#     pyproj  PROJ transformers (per thread)
+#     numpy   closed-form WGS 84 conversions: geodetic -> ECEF directly and
+#             ECEF -> geodetic per Heikkinen (1982), as given by Zhu (1994),
+#             "Conversion of Earth-centered Earth-fixed coordinates to
+#             geodetic coordinates," IEEE Trans. Aerospace and Electronic
+#             Systems 30(3)
+
+import math
+from   math import fmod, hypot, radians, pi
+import threading
+from   types import SimpleNamespace
+
+import numpy as np
+from   pyproj import CRS, Transformer
+
+#############
+# Constants #
+#############
+
+# WGS 84
+_eMinRadius = 6356.752314245    # km
+_eMaxRadius = 6378.137          # km
+
+_g          = 9.80665           # m/s**2
+
+_a          = _eMaxRadius * 1000.0          # semi-major axis (m)
+_b          = _eMinRadius * 1000.0          # semi-minor axis (m)
+_e2         = 1.0 - (_b / _a) ** 2          # first eccentricity squared
+_ep2        = (_a / _b) ** 2 - 1.0          # second eccentricity squared
+_1_e2       = 1.0 - _e2
+_e4         = _e2 * _e2
+_e2E2       = _e2 * (_a * _a - _b * _b)     # e**2 · E**2 (linear eccentricity)
+_54b2       = 54.0 * _b * _b
+
+_180deg     = 180.0
+_180rad     = pi
+_90deg      = 90.0
+_90rad      = _180rad / 2.0
+_270deg     = 270.0
+_270rad     = _90rad + _180rad
+_360deg     = 360.0
+_360rad     = 2.0 * _180rad
+
+#############
+# Functions #
+#############
+
+sin     = lambda _d: math.sin (radians (_d))
+cos     = lambda _d: math.cos (radians (_d))
+eRadius = lambda _lat: hypot (_eMaxRadius * cos (_lat), _eMinRadius * sin (_lat))
+
+# pyproj CRSs
+# ECEF (Earth-Centered, Earth-Fixed) CRS
+_ECEF_CRS = CRS.from_proj4 ("+proj=geocent +ellps=WGS84 +datum=WGS84")
+# LLA (Latitude, Longitude, Altitude) CRS
+_LLA_CRS  = CRS.from_proj4 ("+proj=latlong +ellps=WGS84 +datum=WGS84")
+
+_pyprojLocal = threading.local ()    # per-thread transformers
+
+def _pyprojTransformers () -> tuple:
+    if (_transformers := getattr (_pyprojLocal, 'transformers', None)) is None:
+        _transformers = (Transformer.from_crs (_LLA_CRS,  _ECEF_CRS, always_xy = True),
+                         Transformer.from_crs (_ECEF_CRS, _LLA_CRS,  always_xy = True))
+        _pyprojLocal.transformers = _transformers
+
+    return _transformers
+
+def _pyprojLLAToECEF (_lons, _lats, _alts) -> tuple:
+    return _pyprojTransformers ()[0].transform (_lons, _lats, _alts, radians = False)
+
+def _pyprojECEFToLLA (_xs, _ys, _zs) -> tuple:
+    return _pyprojTransformers ()[1].transform (_xs, _ys, _zs, radians = False)
+
+_ScalarOps = SimpleNamespace (sqrt = math.sqrt, cbrt = math.cbrt, sin = math.sin, cos = math.cos, atan2 = math.atan2,
+                              radians = math.radians, degrees = math.degrees, maximum = max)
+_ArrayOps  = SimpleNamespace (sqrt = np.sqrt, cbrt = np.cbrt, sin = np.sin, cos = np.cos, atan2 = np.arctan2,
+                              radians = np.radians, degrees = np.degrees, maximum = np.maximum)
+
+_opsFor = lambda _v: _ArrayOps if isinstance (_v, np.ndarray) else _ScalarOps    # scalars avoid ufunc overhead
+
+def _numpyLLAToECEF (_lons, _lats, _alts) -> tuple:
+    _ops  = _opsFor (_lons)
+    _lons = _ops.radians (_lons)
+    _lats = _ops.radians (_lats)
+
+    _sinLat = _ops.sin (_lats)
+    _N      = _a / _ops.sqrt (1.0 - _e2 * _sinLat * _sinLat)    # prime vertical radius of curvature
+    _rcLat  = (_N + _alts) * _ops.cos (_lats)
+
+    return (_rcLat * _ops.cos (_lons),
+            _rcLat * _ops.sin (_lons),
+            (_N * _1_e2 + _alts) * _sinLat)
+
+def _numpyECEFToLLA (_xs, _ys, _zs) -> tuple:
+    _ops = _opsFor (_xs)
+    _p2  = _xs * _xs + _ys * _ys
+    _p   = _ops.sqrt (_p2)
+    _z2  = _zs * _zs
+
+    _F   = _54b2 * _z2
+    _G   = _p2 + _1_e2 * _z2 - _e2E2
+    _c   = _e4 * _F * _p2 / (_G * _G * _G)
+    _s   = _ops.cbrt (1.0 + _c + _ops.sqrt (_c * _c + 2.0 * _c))
+    _k   = _s + 1.0 + 1.0 / _s
+    _P   = _F / (3.0 * _k * _k * _G * _G)
+    _Q   = _ops.sqrt (1.0 + 2.0 * _e4 * _P)
+    _r0  = _ops.sqrt (_ops.maximum (0.5 * _a * _a * (1.0 + 1.0 / _Q) - _P * _1_e2 * _z2 / (_Q * (1.0 + _Q)) - 0.5 * _P * _p2, 0.0)) - \
+           _P * _e2 * _p / (1.0 + _Q)      # the radicand may round below zero on the polar axis
+    _pR  = _p - _e2 * _r0
+    _aV  = _a * _ops.sqrt (_pR * _pR + _1_e2 * _z2)
+
+    return (_ops.degrees (_ops.atan2 (_ys, _xs)),
+            _ops.degrees (_ops.atan2 (_zs * (1.0 + _ep2 * _b * _b / _aV), _p)),
+            _ops.sqrt (_pR * _pR + _z2) * (1.0 - _b * _b / _aV))
+
+_GeodesyBackends = {
+    'pyproj': (_pyprojLLAToECEF, _pyprojECEFToLLA),
+    'numpy':  (_numpyLLAToECEF,  _numpyECEFToLLA)
+}
+
+_llaToECEF, _ecefToLLA = _GeodesyBackends['pyproj']
+
+def setGeodesyBackend (_backend: str):
+    global _llaToECEF, _ecefToLLA
+    _llaToECEF, _ecefToLLA = _GeodesyBackends[_backend]
+
+def llaToECEF (_lons, _lats, _alts) -> tuple:
+    return _llaToECEF (_lons, _lats, _alts)
+
+def ecefToLLA (_xs, _ys, _zs) -> tuple:
+    return _ecefToLLA (_xs, _ys, _zs)
+
+def _wrapLongitude (_lon: float, *_offsets: *[float]) -> float:
+    for _offset in _offsets:
+        _lon += _offset
+
+    if  (_lon := fmod (_lon, _360deg)) > _180deg:
+        _lon -= _360deg
+    elif _lon < -_180deg:
+        _lon += _360deg
+
+    return _lon
+
+def _wrapLongitudes (_lons: np.ndarray, *_offsets) -> np.ndarray:     # vectorized _wrapLongitude ()
+    for _offset in _offsets:
+        _lons = _lons + _offset
+
+    _lons = np.fmod (_lons, _360deg)
+    _lons = np.where (_lons >  _180deg, _lons - _360deg, _lons)
+
+    return  np.where (_lons < -_180deg, _lons + _360deg, _lons)
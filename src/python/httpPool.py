@@ -0,0 +1,304 @@
+# Description
+#
+#   Pooled, keep-alive HTTP POSTs of JSON payloads.
+#
+#   HttpPool shares one requests.Session per endpoint origin (scheme, host,
+#   and port) among all threads, so that successive posts reuse established
+#   connections instead of opening (and leaving in TIME_WAIT) a new one per
+#   request.  Each session's connection pool holds up to POOL_SIZE
+#   connections, and every request is bounded by CONNECT_TIMEOUT and
+#   TIMEOUT.
+#
+#   A payload posted to several endpoints may be serialized once (cf.,
+#   encode ()) and posted as bytes.
+#
+#   submit () decouples the caller from the network: each endpoint has an
+#   HttpDispatcher whose IN_FLIGHT worker threads deliver its queued
+#   payloads.  Payloads are queued by key (e.g., satellite interval): a
+#   payload that is still queued when a newer one with the same key is
+#   submitted is superseded (latest value wins), so a slow endpoint sees
+#   fewer, current positions instead of an ever-growing backlog.  Payloads
+#   with the same key are delivered in order.  Without superseding (cf.,
+#   configure ()), a submitter instead waits for its key's queued payload
+#   to be taken (backpressure), so that every payload is delivered.
+#
+#   Each endpoint's deliveries pass through a CircuitBreaker shared by all
+#   submitters: after FAILURES consecutive failures it opens, and deliveries
+#   are held back (while queued payloads keep being superseded) until a
+#   single half-open probe, retried with exponential backoff, succeeds.
+#   Failures are logged at most once per LOG_INTERVAL.
+
+from   collections import OrderedDict
+import json
+from   threading import Condition, Lock, Thread
+import time
+from   urllib.parse import urlsplit
+
+import requests
+from   requests.adapters import HTTPAdapter
+
+
+class CircuitBreaker:   # closed -> (FAILURES consecutive failures) open -> (backoff) half-open -> (probe) closed or open
+    FAILURES     = 3
+    BACKOFF_MIN  = 1.0          # seconds
+    BACKOFF_MAX  = 60.0         # seconds
+    LOG_INTERVAL = 30.0         # seconds
+
+    def __init__ (self, _url: str):
+        self.url         = _url
+        self._lock       = Lock ()
+        self._failures   = 0        # consecutive
+        self._backoff    = 0.0      # 0.0: closed
+        self._retryTime  = 0.0      # half-open at (cf., time.monotonic ())
+        self._probing    = False
+        self._logTime    = 0.0
+        self._suppressed = 0        # failures not logged since the last log line
+
+    def isOpen (self) -> bool:
+        return self._backoff > 0.0
+
+    def delay (self) -> tuple[float, bool]:
+        """
+        Return (0.0, <probe>) when a request may be attempted now, where
+        <probe> is True when the caller has claimed the half-open probe
+        (and must pass it to failed ()), otherwise (<seconds to hold
+        back>, False).
+        """
+        with self._lock:
+            if not self._backoff:
+                return 0.0, False
+
+            if self._probing:
+                return self._backoff, False
+
+            if (_wait := self._retryTime - time.monotonic ()) > 0.0:
+                return _wait, False
+
+            self._probing = True
+            return 0.0, True
+
+    def succeeded (self):
+        with self._lock:
+            if self._backoff:
+                print (f'INFO: {self.url}: recovered after {self._failures} consecutive failures')
+
+            self._failures = 0
+            self._backoff  = 0.0
+            self._probing  = False
+
+    def failed (self, _error: str, _probe: bool):      # _probe: the request claimed the half-open probe (cf., delay ())
+        with self._lock:
+            self._failures += 1
+
+            if _probe:
+                self._probing   = False
+                self._backoff   = min (2.0 * self._backoff, self.BACKOFF_MAX)
+                self._retryTime = time.monotonic () + self._backoff
+            elif not self._backoff and self._failures >= self.FAILURES:
+                self._backoff   = self.BACKOFF_MIN
+                self._retryTime = time.monotonic () + self._backoff
+
+            # Rate-limited status
+
+            if (_now := time.monotonic ()) < self._logTime:
+                self._suppressed += 1
+                return
+
+            _state  = f'open; retry in {self._backoff:.1f} s' if self._backoff else 'closed'
+            _suppr  = f', {self._suppressed} not logged' if self._suppressed else ''
+            print (f'ERROR: {self.url}: {_error} ({self._failures} consecutive failures{_suppr}; {_state})')
+
+            self._logTime    = _now + self.LOG_INTERVAL
+            self._suppressed = 0
+
+class HttpDispatcher:
+
+    def __init__ (self, _url: str, _inFlight: int, _breaker: CircuitBreaker):
+        self.url        = _url
+        self.sent       = 0
+        self.failed     = 0
+        self.superseded = 0
+
+        self._pending   = OrderedDict ()    # key: <payload key>, val: <payload>
+        self._inFlight  = set ()            # keys being delivered
+        self._cond      = Condition ()
+        self._breaker   = _breaker
+
+        for _i in range (_inFlight):
+            Thread (target = self._deliver,
+                    name   = f'HTTP {urlsplit (_url).path} #{_i + 1}',
+                    daemon = True).start ()
+
+    def put (self, _key, _payload: dict | bytes, _supersede: bool = True):
+        with self._cond:
+            if not _supersede:
+                self._cond.wait_for (lambda: _key not in self._pending or self._breaker.isOpen ())
+
+            if _key in self._pending:
+                self.superseded += 1
+            self._pending[_key] = _payload     # a superseding payload keeps its predecessor's place
+            self._cond.notify_all ()
+
+    def _next (self):      # caller holds self._cond
+        for _key in self._pending:
+            if _key not in self._inFlight:
+                return _key
+
+        return None
+
+    def _deliver (self):
+        while True:
+            with self._cond:
+                while True:
+                    if (_key := self._next ()) is not None:
+                        _wait, _probe = self._breaker.delay ()
+                        if _wait <= 0.0:
+                            break
+
+                    self._cond.wait (None if _key is None else _wait)
+
+                _payload = self._pending.pop (_key)
+                self._inFlight.add (_key)
+
+            _ok = HttpPool.deliver (self.url, _payload, _probe)
+
+            with self._cond:
+                self._inFlight.discard (_key)
+                if _ok:
+                    self.sent   += 1
+                else:
+                    self.failed += 1
+                self._cond.notify_all ()
+
+    def flush (self, _timeout: float = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for (lambda: (not self._pending or self._breaker.isOpen ()) and not self._inFlight, _timeout)
+
+class HttpPool:
+    POOL_SIZE       = 10        # connections per endpoint origin
+    CONNECT_TIMEOUT = 3.0       # seconds
+    TIMEOUT         = 10.0      # seconds (read)
+    IN_FLIGHT       = 2         # concurrent submit () deliveries per endpoint (0: deliver synchronously)
+    SUPERSEDE       = True      # submit () drops a queued payload for a newer one with its key (otherwise waits)
+
+    _HEADERS  = {'Content-Type': 'application/json'}
+
+    _sessions    = dict ()      # key: (scheme, netloc), val: requests.Session
+    _dispatchers = dict ()      # key: <url>, val: HttpDispatcher
+    _breakers    = dict ()      # key: <url>, val: CircuitBreaker
+    _lock        = Lock ()
+
+    @classmethod
+    def configure (cls, _poolSize: int = None, _timeout: float = None, _inFlight: int = None, _supersede: bool = None):
+        """
+        Set the pool size (for sessions created hereafter), the request
+        timeout, the in-flight limit (for dispatchers created hereafter),
+        and whether submit () supersedes queued payloads.
+        """
+        if _poolSize:
+            cls.POOL_SIZE = _poolSize
+        if _timeout:
+            cls.TIMEOUT   = _timeout
+        if _inFlight is not None:
+            cls.IN_FLIGHT = _inFlight
+        if _supersede is not None:
+            cls.SUPERSEDE = _supersede
+
+    @classmethod
+    def session (cls, _url: str) -> requests.Session:
+        _key = urlsplit (_url)[:2]
+
+        with cls._lock:
+            if (_session := cls._sessions.get (_key)) is None:
+                _adapter = HTTPAdapter (pool_connections = 1, pool_maxsize = cls.POOL_SIZE)
+                _session = requests.Session ()
+                _session.mount ('http://',  _adapter)
+                _session.mount ('https://', _adapter)
+                cls._sessions[_key] = _session
+
+        return _session
+
+    @staticmethod
+    def encode (_payload: dict) -> bytes:
+        return json.dumps (_payload, allow_nan = False).encode ()   # cf., requests.post (json = ...)
+
+    @classmethod
+    def post (cls, _url: str, _payload: dict | bytes) -> requests.Response:
+        """
+        POST a JSON payload (a dict or its encode () bytes) to _url.
+        """
+        return cls.session (_url).post (_url,
+                                        data    = _payload if isinstance (_payload, bytes) else cls.encode (_payload),
+                                        headers = cls._HEADERS,
+                                        timeout = (min (cls.CONNECT_TIMEOUT, cls.TIMEOUT), cls.TIMEOUT))
+
+    @classmethod
+    def breaker (cls, _url: str) -> CircuitBreaker:
+        with cls._lock:
+            if (_breaker := cls._breakers.get (_url)) is None:
+                _breaker = CircuitBreaker (_url)
+                cls._breakers[_url] = _breaker
+
+        return _breaker
+
+    @classmethod
+    def deliver (cls, _url: str, _payload: dict | bytes, _probe: bool = False) -> bool:
+        """
+        post () and report the outcome to the endpoint's circuit breaker
+        (rather than raise); _probe: the caller claimed the breaker's
+        half-open probe (cf., CircuitBreaker.delay ()).
+        """
+        _breaker = cls.breaker (_url)
+        try:
+            cls.post (_url, _payload).raise_for_status ()
+        except Exception as _e:
+            _breaker.failed (str (_e), _probe)
+            return False
+
+        _breaker.succeeded ()
+        return True
+
+    @classmethod
+    def submit (cls, _url: str, _key, _payload: dict | bytes):
+        """
+        Queue a payload for delivery to _url, superseding (or, cf.,
+        SUPERSEDE, awaiting delivery of) any queued payload with the same
+        _key.
+        """
+        if not cls.IN_FLIGHT:
+            _wait, _probe = cls.breaker (_url).delay ()
+            if not _wait:                           # otherwise drop
+                cls.deliver (_url, _payload, _probe)
+            return
+
+        _breaker = cls.breaker (_url)
+
+        with cls._lock:
+            if (_dispatcher := cls._dispatchers.get (_url)) is None:
+                _dispatcher = HttpDispatcher (_url, cls.IN_FLIGHT, _breaker)
+                cls._dispatchers[_url] = _dispatcher
+
+        _dispatcher.put (_key, _payload, cls.SUPERSEDE)
+
+    @classmethod
+    def flush (cls, _timeout: float = None) -> bool:
+        """
+        Wait (up to _timeout seconds per endpoint) for queued payloads
+        to be delivered.
+        """
+        with cls._lock:
+            _dispatchers = list (cls._dispatchers.values ())
+
+        return all ([_dispatcher.flush (_timeout) for _dispatcher in _dispatchers])
+
+    @classmethod
+    def stats (cls) -> dict:    # key: <url>, val: (<sent>, <failed>, <superseded>)
+        with cls._lock:
+            return {_url: (_d.sent, _d.failed, _d.superseded) for _url, _d in cls._dispatchers.items ()}
+
+    @classmethod
+    def close (cls):
+        with cls._lock:
+            for _session in cls._sessions.values ():
+                _session.close ()
+            cls._sessions.clear ()
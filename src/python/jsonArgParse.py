@@ -196,14 +196,34 @@ def endpointArgs (_args) -> dict:
         _intList.append ((_ep, _interval))
 
     _epDict = dict ()
-    for _ep in _args.endpoint:
+    for _ep in _args.endpoint or ():
         if   isinstance (_ep, str):
             _addEndpoint (_ep)
 
-        elif isinstance (_ep, tuple):
-            _addEndpoint (_ep[1], _ep[0])
+        elif isinstance (_ep, tuple):     # (<endpoint>, <interval>); cf., timedHTTPEndpoint ()
+            _addEndpoint (_ep[0], _ep[1])
 
-    return _epDict
+    # Without endpoints (e.g., orbitApp.py file output), sample at the global interval
+
+    return _epDict if _epDict else {_args.interval: list ()}
+
+def cadenceArgs (_epDict: dict) -> dict:
+
+    # Group endpoint intervals (cf., endpointArgs ()) into orbit streams, each propagated at its
+    # finest interval: key: <stream interval>, val: {<interval>: <stride>}, where <interval> is
+    # fed every <stride> stream ticks.  An interval joins the first stream whose interval it is
+    # a multiple of; otherwise it starts its own stream.
+
+    _cadences = dict ()
+    for _interval in sorted (_epDict):
+        for _sInterval, _strides in _cadences.items ():
+            if abs ((_stride := round (_interval / _sInterval)) * _sInterval - _interval) <= 1.0e-9 * _interval:
+                _strides[_interval] = _stride
+                break
+        else:
+            _cadences[_interval] = {_interval: 1}
+
+    return _cadences
 
 def hilArgs (_args) -> dict:
     _hilDict = dict ()
@@ -213,6 +233,9 @@ def hilArgs (_args) -> dict:
 
     return _hilDict
 
+def shardRanges (_numSats: int, _numShards: int) -> list:     # balanced, contiguous [<begin>, <end>) satellite indices (plane-major)
+    return [(_i * _numSats // _numShards, (_i + 1) * _numSats // _numShards) for _i in range (_numShards)]
+
 def orbitAppArgs (_cliParser):
     _cliParser.add_argument ('-N', '--num-sats',
                              type     = numSatType,
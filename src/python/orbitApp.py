@@ -45,6 +45,32 @@
 #        "time-multiplier": > 0.0; default: 1.0,
 #        "real-time": boolean; default: false,
 #        "start-time": [[<hh>:]<mm>:]<ss>; default: null,
+#        "engine": "thread", "vector" (batched per interval), or "scheduler"
+#               (batched, single thread); default: "thread",
+#        "workers": >= 0, "scheduler" worker pool size; default: 0,
+#        "ephemeris": >= 0, "vector" and "scheduler" ephemeris samples per
+#               orbit (e.g., 3600); default: 0 (disabled),
+#        "ephemeris-dir": directory of ephemeris files shared (memory-mapped)
+#               by a host's processes; default: null (per process),
+#        "geodesy": "pyproj" or "numpy" (closed-form WGS 84 kernels);
+#               default: "pyproj",
+#        "http-pool": keep-alive connections per endpoint; default: 10,
+#        "http-timeout": HTTP request timeout (seconds); default: 10.0,
+#        "http-in-flight": >= 0, concurrent position deliveries per endpoint
+#               (0: synchronous); default: 2,
+#        "catch-up": "coalesce", "skip", or "burst", missed tick policy;
+#               default: "coalesce",
+#        "spin": >= 0.0, seconds of busy-waiting before each tick deadline
+#               (e.g., 0.002); default: 0.0,
+#        "processes": >= 0, file output (no endpoints) worker processes, each
+#               computing whole satellite traces; requires duration;
+#               default: 0 (disabled),
+#        "virtual-time": boolean, advance simulated time as fast as possible
+#               (unpaced; every position delivered); default: false,
+#        "shards": >= 0, constellation worker processes among which the
+#               satellites are partitioned; default: 0 (disabled),
+#        "shard-node": constellation node name, whose satellites are
+#               assigned by the Q controller; default: null (all),
 #        "Q-endpoint": "http://10.100.100.100:16171/register",
 #        "Q-ZMQ-pub": "tcp://10.100.100.100:12343",
 #        "endpoint": [
@@ -54,65 +80,74 @@
 
 import argparse
 import csv
-import math
-from   math import sqrt, fmod, hypot, radians, pi, isnan, isinf, dist
+from   contextlib import ExitStack
+from   math import radians, isnan, isinf
 import threading
 from   threading import Thread, RLock, Condition
 import time
+from   typing import NamedTuple
 
 import numpy as np
-from   pyproj import CRS, Transformer
-import requests
 from   scipy.spatial.transform import Rotation
 
-from   jsonArgParse import JSONArgParse, altType, hhmmssType, incType, lonType, minFloatType, orbitAppArgs, endpointArgs
+from   geodesy      import _eMaxRadius, _360deg, sin, llaToECEF, ecefToLLA, setGeodesyBackend, _wrapLongitude
+from   jsonArgParse import JSONArgParse, altType, hhmmssType, incType, lonType, minFloatType, minIntType, orbitAppArgs, endpointArgs, cadenceArgs
+from   orbitEngine  import OrbitEngine, orbitalSpeed, orbitalDistance, orbitalVelocity, orbitPhase, planeGeometry
+from   orbitScheduler import OrbitScheduler, TickClock, TickLateness, sleepUntil
+from   orbitTrace   import writeTraces, writeColumnar, isColumnar
+from   httpPool     import HttpPool
+
+###########
+# Classes #
+###########
+
+class SatModes (NamedTuple):     # a satellite interval's mode callbacks; immutable, so replaced whole (copy on write)
+    debugFn:  object = None     # errant 'debug' mode; _writeGeoDict ()
+    exfiltFn: object = None     # 'exfilt' mode; _exfiltrate ()
+
+class SatInterval:      # a satellite's endpoint cadence, fed every <stride> ticks of its orbit stream
+    __slots__ = ('iPlane', 'iSat', 'interval', 'stride', 'thread', 'clock', 'lateness', 'modes')
+
+    def __init__ (self, _iPlane: int, _iSat: int, _interval: float, _stride: int = 1):
+        self.iPlane   = _iPlane
+        self.iSat     = _iSat
+        self.interval = _interval
+        self.stride   = _stride
+        self.thread   = None        # orbit stream's thread; assigned by startSatellites ()
+        self.clock    = None        # orbit stream's TickClock; assigned when paced
+        self.lateness = None        # this satellite interval's TickLateness (at publication); assigned when paced
+        self.modes    = SatModes () # replaced (under OrbitApp._rLock) by control handlers; read by publishers without locking
+
+    def join (self):
+        while self.thread is None:      # published (in OrbitApp._threads) just before its thread is assigned
+            time.sleep (0.01)
+        self.thread.join ()
+
+class CountedRLock:     # an RLock counting its acquisitions and the contended (blocked) ones; cf., --info
+    __slots__ = ('_lock', 'acquired', 'contended')
 
-#############
-# Constants #
-#############
-
-# WGS 84
-_eMinRadius = 6356.752314245    # km
-_eMaxRadius = 6378.137          # km
-
-_g          = 9.80665           # m/s**2
-
-_180deg     = 180.0
-_180rad     = pi
-_90deg      = 90.0
-_90rad      = _180rad / 2.0
-_270deg     = 270.0
-_270rad     = _90rad + _180rad
-_360deg     = 360.0
-_360rad     = 2.0 * _180rad
-
-#############
-# Functions #
-#############
-
-sin     = lambda _d: math.sin (radians (_d))
-cos     = lambda _d: math.cos (radians (_d))
-eRadius = lambda _lat: hypot (_eMaxRadius * cos (_lat), _eMinRadius * sin (_lat))
+    def __init__ (self):
+        self._lock     = RLock ()
+        self.acquired  = 0
+        self.contended = 0
 
-# pyproj CRSs
-# ECEF (Earth-Centered, Earth-Fixed) CRS
-_ECEF_CRS = CRS.from_proj4 ("+proj=geocent +ellps=WGS84 +datum=WGS84")
-# LLA (Latitude, Longitude, Altitude) CRS
-_LLA_CRS  = CRS.from_proj4 ("+proj=latlong +ellps=WGS84 +datum=WGS84")
+    def acquire (self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self._lock.acquire (False):
+            if not blocking or not self._lock.acquire (True, timeout):
+                return False
+            self.contended += 1     # counters are updated while holding the lock
 
-ECEF_to_LLA = Transformer.from_crs (_ECEF_CRS, _LLA_CRS,  always_xy = True)
-LLA_to_ECEF = Transformer.from_crs (_LLA_CRS,  _ECEF_CRS, always_xy = True)
+        self.acquired += 1
+        return True
 
-def _wrapLongitude (_lon: float, *_offsets: *[float]) -> float:
-    for _offset in _offsets:
-        _lon += _offset
+    def release (self):
+        self._lock.release ()
 
-    if  (_lon := fmod (_lon, _360deg)) > _180deg:
-        _lon -= _360deg
-    elif _lon < -_180deg:
-        _lon += _360deg
+    def __enter__ (self):
+        return self.acquire ()
 
-    return _lon
+    def __exit__ (self, *_vargs):
+        self.release ()
 
 class OrbitApp (JSONArgParse):
 
@@ -120,14 +155,17 @@ class OrbitApp (JSONArgParse):
         super ().__init__ ()
         self._debug    = self._args.debug
         self._startC   = Condition ()    # start Condition
-        self._threads  = dict ()         # _genOrbit threads; key: (iPlane, iSat, interval), val: <thread>
-        self._rThreads = set ()          # running _genOrbit threads
-        self._rLock    = RLock ()        # mutex for _threads, _rThreads, _debugFn, and _exfiltFn
-        self._stopSet  = set ()          # threads to stop
+        self._threads  = dict ()         # satellite intervals; key: (iPlane, iSat, interval), val: SatInterval
+        self._index    = dict ()         # satellite intervals by satellite; key: (iPlane, iSat), val: {interval: SatInterval}
+        self._rThreads = set ()          # running satellite intervals; (iPlane, iSat, interval)
+        self._rLock    = CountedRLock () # mutex for _threads, _index, _rThreads, _stopSet, _nStopped, and SatInterval.modes updates
+        self._stopSet  = set ()          # satellite intervals to stop
+        self._nStopped = 0               # _threads' satellite intervals in _stopSet
+        self._started  = False           # start notified (cf., startThreads ()); streams started later don't wait
+        self._vTicks   = 0               # computed satellite positions (cf., --virtual-time)
+        self._vTime    = 0.0             # simulated time reached (seconds)
         self.epArgs    = endpointArgs (self._args)
-
-        self._debugFn  = dict ()         # errant 'debug' mode; key: <thread>, value: _writeGeoDict ()
-        self._exfiltFn = dict ()         # 'exfilt' mode; key: <thread>, value: _exfiltrate ()
+        self.cadArgs   = cadenceArgs  (self.epArgs)
 
     def moreEpilogNotes (self):
         return ''
@@ -197,7 +235,52 @@ Notes
                               help   = 'start time ([[<hh>:]<mm>:]<ss>); default: %(default)s)')
         _parser.add_argument ('-F', '--format',
                               default = 'sat_{plane}_{ordinal}.csv',
-                              help    = 'output file format (default: "%(default)s")')
+                              help    = 'output file format; a ".npy" or ".parquet" (requires pyarrow) name selects one columnar file for the whole constellation (requires DURATION; default: "%(default)s")')
+        _parser.add_argument ('--engine',
+                              choices = ('thread', 'vector', 'scheduler'),
+                              default = 'thread',
+                              help    = 'orbit engine: a thread per satellite interval, a batched (vectorized) thread per interval, or a single batched scheduler thread (default: %(default)s)')
+        _parser.add_argument ('--workers',
+                              type    = minIntType,
+                              default = 0,
+                              help    = 'scheduler engine worker pool size (0: run ticks on the scheduler thread; default: %(default)s)')
+        _parser.add_argument ('--ephemeris',
+                              type    = minIntType,
+                              default = 0,
+                              help    = 'vector and scheduler engines\' cached ephemeris resolution (samples per orbit, e.g., 3600; 0: transform every tick; default: %(default)s)')
+        _parser.add_argument ('--ephemeris-dir',
+                              help    = 'directory of ephemeris files (named by a hash of the orbital configuration) written once and memory-mapped by every process on a host (default: %(default)s, per process)')
+        _parser.add_argument ('--geodesy',
+                              choices = ('pyproj', 'numpy'),
+                              default = 'pyproj',
+                              help    = 'geodetic <-> ECEF transformations: PROJ transformers or closed-form NumPy kernels (default: %(default)s)')
+        _parser.add_argument ('--http-pool',
+                              type    = minIntType,
+                              default = HttpPool.POOL_SIZE,
+                              help    = 'keep-alive HTTP connections per endpoint (default: %(default)s)')
+        _parser.add_argument ('--http-timeout',
+                              type    = minFloatType,
+                              default = HttpPool.TIMEOUT,
+                              help    = 'HTTP request timeout (seconds; default: %(default)s)')
+        _parser.add_argument ('--http-in-flight',
+                              type    = minIntType,
+                              default = HttpPool.IN_FLIGHT,
+                              help    = 'concurrent position deliveries per endpoint; a position superseded while queued is dropped (0: post synchronously; default: %(default)s)')
+        _parser.add_argument ('--catch-up',
+                              choices = TickClock.POLICIES,
+                              default = TickClock.POLICIES[0],
+                              help    = 'missed tick policy: publish the latest due tick, resume at the next deadline, or publish every missed tick (default: %(default)s)')
+        _parser.add_argument ('--spin',
+                              type    = minFloatType,
+                              default = 0.0,
+                              help    = 'seconds of busy-waiting before each tick deadline for sub-millisecond accuracy (e.g., 0.002; default: %(default)s)')
+        _parser.add_argument ('--processes',
+                              type    = minIntType,
+                              default = 0,
+                              help    = 'file output (no endpoints) worker processes, each computing whole satellite traces at once; requires DURATION (0: disabled; default: %(default)s)')
+        _parser.add_argument ('--virtual-time',
+                              action  = 'store_true',
+                              help    = 'advance simulated time as fast as computation and endpoints allow (every position is delivered) and report ticks per second')
 
         _parser.add_argument ('--info',
                               action = 'store_true',
@@ -210,42 +293,157 @@ Notes
         return _parser
 
     def threadsWith (self, iPlane: int, iSat: int):
-        _intThreads = list ()
+        with self._rLock:
+            return list (self._index.get ((iPlane, iSat), dict ()).values ())
+
+    def satIntervalsIn (self, _planeRange: tuple = None, _satRange: tuple = None) -> list:
+        """
+        Return the satellite intervals of the satellites in the inclusive
+        plane and ordinal ranges (default: all), in time proportional to
+        the number of satellites in range (or running, if fewer).
+        """
+        _planeRange = _planeRange or (1, self._args.num_planes)
+        _satRange   = _satRange   or (1, self._args.num_sats)
 
         with self._rLock:
-            for _tuple, _thread in self._threads.items ():
-                if _tuple[0] == iPlane and _tuple[1] == iSat:
-                    _intThreads.append (_thread)
+            if (_planeRange[1] - _planeRange[0] + 1) * (_satRange[1] - _satRange[0] + 1) > len (self._index):
+                _satInts = [_satInt for (_iPlane, _iSat), _satInts in self._index.items ()
+                                    if _planeRange[0] <= _iPlane <= _planeRange[1] and _satRange[0] <= _iSat <= _satRange[1]
+                                    for _satInt in _satInts.values ()]
+            else:
+                _satInts = [_satInt for _iPlane in range (_planeRange[0], _planeRange[1] + 1)
+                                    for _iSat   in range (_satRange[0],   _satRange[1]   + 1)
+                                    for _satInt in self._index.get ((_iPlane, _iSat), dict ()).values ()]
 
-        return _intThreads
+        return _satInts
 
-    def startOrbit (self, _target, _numPlanes, _numSats):
+    def setModes (self, _satInts: list, **_kwargs):
+        """
+        Replace the satellite intervals' mode callbacks (cf., SatModes;
+        e.g., debugFn = None disables 'debug' mode).
+        """
+        with self._rLock:
+            for _satInt in _satInts:
+                _satInt.modes = _satInt.modes._replace (**_kwargs)
 
-        # Iterate over interval dict entries
-
-        for _interval, _endpoint in self.epArgs.items ():
-            _nvargs = {'interval': _interval,
-                       'endpoint': _endpoint
-                      }
-            for _j in range (self._args.num_planes):
-                _iPlane = _j + 1
-                for _i in range (self._args.num_sats):
-                    _iSat   = _i + 1
-                    _thread = Thread (target = _target,
-                                      name   = f'Gen node #{_iSat}',
-                                      args   = (_iPlane, _iSat, _nvargs),
-                                      daemon = True)
-                    with self._rLock:
-                        self._threads[(_iPlane, _iSat, _interval)] = _thread
-                    _thread.start ()
+    def stopSatIntervals (self, _satInts: list):
+        with self._rLock:
+            for _satInt in _satInts:
+                if _satInt not in self._stopSet:
+                    self._stopSet.add (_satInt)
+                    if self._threads.get ((_satInt.iPlane, _satInt.iSat, _satInt.interval)) is _satInt:
+                        self._nStopped += 1
+
+    def tickStats (self) -> dict:
+        """
+        Return paced satellite intervals' tick timing (cf., TickClock.stats
+        ()): each satellite interval's own lateness, measured as its record
+        is published, with its orbit stream's dropped and overrun ticks
+        (a vector or scheduler stream's satellites share them); key:
+        (iPlane, iSat, interval).
+        """
+        with self._rLock:
+            return {_key: TickClock.stats ([_satInt.clock], [_satInt.lateness])
+                    for _key, _satInt in self._threads.items () if _satInt.clock}
+
+    def countTicks (self, _ticks: int, _time: float):
+        with self._rLock:
+            self._vTicks += _ticks
+            self._vTime   = max (self._vTime, _time)
+
+    def runTicks (self, *_tickGens):
+        """
+        Drive batched engine generators (cf., _genConstellation ()): each
+        first registers its satellite intervals, then yields the monotonic
+        time of its next tick.  The vector engine sleeps between ticks of
+        its one generator, while the scheduler engine shares a deadline
+        scheduler among all of them.
+        """
+        with self._startC:
+            for _ticks in _tickGens:
+                next (_ticks)
+            if not self._started:
+                self._startC.wait ()
+
+        if self._args.engine == 'scheduler':
+            _scheduler = OrbitScheduler (self._args.workers, self._args.spin)
+            for _ticks in _tickGens:
+                _scheduler.schedule (lambda _ticks = _ticks: next (_ticks, None))
+            _scheduler.run ()
+        else:
+            for _ticks in _tickGens:
+                for _deadline in _ticks:
+                    sleepUntil (_deadline, self._args.spin)
+
+    def startOrbit (self, _target, _numPlanes, _numSats):
+        self.startSatellites (_target, [(_j + 1, _i + 1) for _j in range (_numPlanes) for _i in range (_numSats)])
+
+    def startSatellites (self, _target, _planeOrdinals: list, _kwargs: dict = {}):
+        """
+        Start one orbit stream per satellite and cadence group (cf.,
+        cadenceArgs ()): a stream propagates at its finest interval and
+        feeds slower intervals every <stride> ticks.  The thread engine
+        runs a thread per satellite stream, whereas the batched engines
+        run a generator per stream for all of the satellites.
+        """
+        _tickGens = list ()     # batched engines' (<SatIntervals>, <generator>)
+
+        # Iterate over orbit streams
+
+        for _sInterval, _strides in self.cadArgs.items ():
+            _nvargs = dict (_kwargs,
+                            interval = _sInterval,
+                            endpoint = [_ep for _interval in _strides for _ep in self.epArgs[_interval]])
+
+            _satIntsList = [[SatInterval (_iPlane, _iSat, _interval, _stride) for _interval, _stride in _strides.items ()]
+                            for _iPlane, _iSat in _planeOrdinals]
+
+            with self._rLock:
+                for _satInts in _satIntsList:
+                    for _satInt in _satInts:
+                        _key = (_satInt.iPlane, _satInt.iSat, _satInt.interval)
+                        if (_prior := self._threads.get (_key)) is not None and _prior in self._stopSet:
+                            self._nStopped -= 1     # superseded by a (re)started stream
+                        self._threads[_key] = _satInt
+                        self._index.setdefault (_key[:2], dict ())[_key[2]] = _satInt
+
+            # Batched engines: a single generator drives all of the stream's satellites
+
+            if self._args.engine != 'thread':
+                _satInts = [_satInt for _satInts in _satIntsList for _satInt in _satInts]
+                _tickGens.append ((_satInts, _target (_satInts, _nvargs)))
+                continue
+
+            for _satInts in _satIntsList:
+                _thread = Thread (target = _target,
+                                  name   = f'Gen node #{_satInts[0].iSat}',
+                                  args   = (_satInts, _nvargs),
+                                  daemon = True)
+                for _satInt in _satInts:
+                    _satInt.thread = _thread
+                _thread.start ()
+
+        # Run all generators on a single scheduler thread or each on its own thread
+
+        for _group in [_tickGens] if self._args.engine == 'scheduler' else [[_tickGen] for _tickGen in _tickGens]:
+            _thread = Thread (target = self.runTicks,
+                              name   = 'Orbit scheduler' if self._args.engine == 'scheduler' else \
+                                       f'Gen interval {_group[0][0][0].interval}',
+                              args   = [_ticks for _, _ticks in _group],
+                              daemon = True)
+            for _satInts, _ in _group:
+                for _satInt in _satInts:
+                    _satInt.thread = _thread
+            _thread.start ()
 
         while len (self._rThreads) < len (self._threads):
-            _debugPrint (f'Sleeping ({len (self._rThreads)} < {len (self._threads)})...')
+            self.debugPrint (f'Sleeping ({len (self._rThreads)} < {len (self._threads)})...')
             time.sleep (0.1)
 
     def startThreads (self, _args):
         # Tell all _genOrbits threads to start
         with self._startC:
+            self._started = True
             self._startC.notify_all ()
 
         # Join all threads in the list
@@ -253,9 +451,16 @@ Notes
             for _t in self._threads.values ():
                 _t.join ()
         else:
-            while len (threading.enumerate ()) > 1 and len (self._threads) != len (self._stopSet):
+            while len (threading.enumerate ()) > 1 and self.streaming ():
                 time.sleep (2.0)
 
+    def streaming (self) -> bool:
+        """
+        Return whether any satellite interval is yet to be stopped.
+        """
+        with self._rLock:
+            return self._nStopped < len (self._threads)
+
     def setup (self):
         pass
 
@@ -272,9 +477,15 @@ Notes
         def _debugPrint (*_vargs):
             self.debugPrint (*_vargs)
 
-        def _writeOrbit (_iPlane: int, _iSat: int, _kwargs: dict = {}):
+        def _fileName (_iPlane: int, _iSat: int) -> str:
+            return _args.format.replace ('{plane}',      str (_iPlane))        \
+                               .replace ('{ordinal}',    str (_iSat))          \
+                               .replace ('{num-sats}',   str (_args.num_sats)) \
+                               .replace ('{num-planes}', str (_args.num_planes))
+
+        def _rowWriter (_iPlane: int, _iSat: int, _csvOut):
 
-            def _writeRow (_curTime: float, _lat: float, _lon: float, _alt: float, _delX: float, _delY: float, _delZ: float, _tDel: float) -> bool:
+            def _writeRow (_curTime: float, _lat: float, _lon: float, _alt: float, _delX: float, _delY: float, _delZ: float) -> bool:
                 _row = list ([_iPlane, _iSat])
                 if _args.real_time:
                     _row += [time.time ()]
@@ -284,25 +495,36 @@ Notes
 
                 return True
 
-            _fName = _args.format.replace ('{plane}',      str (_iPlane))        \
-                                 .replace ('{ordinal}',    str (_iSat))          \
-                                 .replace ('{num-sats}',   str (_args.num_sats)) \
-                                 .replace ('{num-planes}', str (_args.num_planes))
+            return _writeRow
 
+        def _writeOrbit (_satInts: list, _kwargs: dict = {}):
+            _iPlane, _iSat = _satInts[0].iPlane, _satInts[0].iSat
             try:
-                with open (_fName, 'w', newline = '') as _fOut:
-                    _csvOut  = csv.writer (_fOut)
-                    _genOrbit (_iPlane, _iSat, _writeRow)
+                with open (_fileName (_iPlane, _iSat), 'w', newline = '') as _fOut:
+                    _genOrbit (_satInts, [_rowWriter (_iPlane, _iSat, csv.writer (_fOut))] * len (_satInts), _kwargs)
             except:     # ePerm
                 pass
 
-        def _publishOrbit (_iPlane: int, _iSat: int, kwargs: dict = {}):
+        def _writeConstellation (_satInts: list, _kwargs: dict = {}):
+            with ExitStack () as _stack:
+                _callbacks = list ()
+                for _satInt in _satInts:
+                    try:
+                        _fOut = _stack.enter_context (open (_fileName (_satInt.iPlane, _satInt.iSat), 'w', newline = ''))
+                        _callbacks.append (_rowWriter (_satInt.iPlane, _satInt.iSat, csv.writer (_fOut)))
+                    except:     # ePerm; stop the satellite at its first tick
+                        _callbacks.append (lambda *_vargs: False)
+
+                yield from _genConstellation (_satInts, _callbacks, _kwargs)
 
-            def _pubGeo (_time: float, _lat: float, _lon: float, _alt: float, _delX: float, _delY: float, _delZ: float, _tDel: float) -> bool:
+        def _geoPublisher (_satInt: SatInterval, kwargs: dict):
+            _iPlane, _iSat = _satInt.iPlane, _satInt.iSat
+
+            def _pubGeo (_time: float, _lat: float, _lon: float, _alt: float, _delX: float, _delY: float, _delZ: float) -> bool:
 
                 # Support multiple endpoints with different timing cadences
 
-                _interval = kwargs.get ('interval', _args.interval)
+                _interval = _satInt.interval
                 _d = {'label':    f'leosat-{_iPlane:02d}-{_iSat:02d}',
                       'plane':    _iPlane,
                       'ordinal':  _iSat,
@@ -326,10 +548,7 @@ Notes
                         _d['color'] = f'bg-{_cName}-500'
                 '''
 
-                with self._rLock:
-                    _cThread  = threading.current_thread ()
-                    _debugFn  = self._debugFn .get (_cThread)
-                    _exfiltFn = self._exfiltFn.get (_cThread)
+                _debugFn, _exfiltFn = _satInt.modes     # lock free (cf., setModes ())
 
                 if   _debugFn and _exfiltFn:
                     _d['color'] = 'bg-pink-500'
@@ -339,20 +558,16 @@ Notes
                     _d['color'] = 'bg-red-500'
 
                 #_debugPrint (f'{_time}: {_d}')
-                time.sleep (_tDel)
 
-                for _ep in kwargs.get ('endpoint'):
+                _body = None    # serialized once for all endpoints
+
+                for _ep in self.epArgs[_interval]:
                     try:
                         _ep   = _ep[0] if isinstance (_ep, tuple) else _ep
-                        _resp = requests.post (_ep, json = _d)
+                        _body = _body or HttpPool.encode (_d)
+                        HttpPool.submit (_ep, (_iPlane, _iSat, _interval), _body)    # latest position wins
                     except Exception as _e:
                         print (f'ERROR: @ {_time} {_d}: {_e}')
-                        continue
-
-                    try:
-                        _resp.raise_for_status ()
-                    except Exception as _e:
-                        print (f'ERROR: @ {_time} {_d}: {_e} {_resp.json ()}')
 
                 if _debugFn:
                     _debugFn  (self, _d)
@@ -362,16 +577,25 @@ Notes
 
                 return True
 
-            _genOrbit (_iPlane, _iSat, _pubGeo, kwargs)
+            return _pubGeo
+
+        def _publishOrbit (_satInts: list, kwargs: dict = {}):
+            _genOrbit (_satInts, [_geoPublisher (_satInt, kwargs) for _satInt in _satInts], kwargs)
+
+        def _publishConstellation (_satInts: list, kwargs: dict = {}):
+            yield from _genConstellation (_satInts, [_geoPublisher (_satInt, kwargs) for _satInt in _satInts], kwargs)
 
-        # Generate CSV orbital data for a single satellite
+        # Generate orbital data for a single satellite's stream, invoking each satellite interval's
+        # callback every <stride> ticks
 
-        def _genOrbit (_iPlane: int, _iSat: int, _callback, _kwargs: dict = {}):
+        def _genOrbit (_satInts: list, _callbacks: list, _kwargs: dict = {}):
+
+            def _retire (_i: int):
+                _live[_i] = False
+                self.stoppedThread (_iPlane, _iSat, _satInts[_i].interval)
 
             def _lla_to_ecef (_lon: float, _lat: float, _alt: float):
-                _xA, _yA, _zA = LLA_to_ECEF.transform ([_lon], [_lat], [_alt],
-                                                       radians = False)
-                return _xA[0], _yA[0], _zA[0]
+                return llaToECEF (_lon, _lat, _alt)
 
             def _transformLLA (_lon: float, _lat: float, _alt: float):
 
@@ -382,15 +606,15 @@ Notes
                     _v            = np.array ([_xA, _yA, _zA])
                     _vRot         = _rotInc.apply (_v) if _yA != 0.0 else _v
 
-                    _lonA, _latA, _altA = ECEF_to_LLA.transform (_vRot[0:1], _vRot[1:2], _vRot[2:3], radians = False)
+                    _lonA, _latA, _altA = ecefToLLA (_vRot[0].item (), _vRot[1].item (), _vRot[2].item ())
 
-                    if isnan (_lonA[0].item ()) or isinf (_lonA[0].item ()):
+                    if isnan (_lonA) or isinf (_lonA):
                         print (f'ERROR: ({_iPlane} {_iSat} @ {_curTime}) {_v} {_vRot} -> {type (_repLon)} {_repLon} {_repLat} {_repRad}')
                         return None
 
-                    _lon = _lonA[0].item ()
-                    _lat = _latA[0].item ()
-                    _alt = _altA[0].item ()
+                    _lon = _lonA
+                    _lat = _latA
+                    _alt = _altA
 
                 # Offset the orbital plane
 
@@ -398,21 +622,14 @@ Notes
 
                 return _lon, _lat, _alt
 
-            _lons = _args.longitude
-            _incs = _args.inclination
-
-            if _args.num_planes > 1:
-                _incRng = _incs[1] - _incs[0]
-                _incDeg = float (_iPlane - 1) * _incRng / float (_args.num_planes - 1) + _incs[0]
-                _lonRng = _lons[1] - _lons[0]
-                _lonOff = float (_iPlane - 1) * _lonRng / float (_args.num_planes - 1) + _lons[0]
-            else:
-                _incDeg = _incs[0]
-                _lonOff = _lons[0]
+            _iPlane, _iSat   = _satInts[0].iPlane, _satInts[0].iSat
+            _incDeg, _lonOff = planeGeometry (_args, _iPlane)
 
             _rotInc = Rotation.from_euler ('x', radians (_incDeg))
 
-            # Time sampling interval
+            _live = [True] * len (_satInts)
+
+            # Time sampling (stream) interval
 
             _interval = _kwargs.get ('interval', _args.interval)
 
@@ -433,101 +650,206 @@ Notes
             _curLon = float (_iSat - 1) * _360deg / float (_args.num_sats)
             _rotLon = 0.0
 
-            # Register this satellite interval thread and wait for start notification
+            # Register this satellite's intervals and wait for start notification
 
             with self._startC:
                 with self._rLock:
-                    self._rThreads.add ((_iPlane, _iSat, _interval))
+                    for _satInt in _satInts:
+                        self._rThreads.add ((_iPlane, _iSat, _satInt.interval))
 
                 _debugPrint (f'Node {_iPlane}/{_iSat}/{_interval}: waiting for notification...')
-                self._startC.wait ()
+                if not self._started:
+                    self._startC.wait ()
 
             _debugPrint (f'Node {_iPlane}/{_iSat}/{_interval}: received notification; processing...')
 
-            _doEP    = _kwargs.get ('endpoint') and (_tWant := _args.start_time)    # _args.start_time from CLI or ZMQ pub
+            # Endpoints are paced from _args.start_time (from CLI or ZMQ pub) or now; file output and
+            # virtual time are unpaced
+
+            if _clock := _kwargs.get ('endpoint') and not _args.virtual_time and \
+                         TickClock (_interval, _args.catch_up, _args.start_time):
+                for _satInt in _satInts:
+                    _satInt.clock    = _clock
+                    _satInt.lateness = TickLateness ()
 
-            _cThread = threading.current_thread ()
             _curTime = 0.0
             _endTime = float (_args.duration) if _args.duration else None
+            _tick    = 0
+            _nTicks  = 0        # computed positions
+
+            while not _endTime or _curTime < _endTime:
 
-            while (not _endTime or _curTime < _endTime) and _cThread not in self._stopSet:
+                for _i, _satInt in enumerate (_satInts):
+                    if _live[_i] and _satInt in self._stopSet:
+                        _retire (_i)
+
+                if not any (_live):
+                    break
 
                 # Endpoint scheduling
 
-                if _doEP:
-                    _tNow = time.time ()
-                    if (_tDel := _tNow - _tWant) < 0.0:
-                        time.sleep (-_tDel)
-                        continue        # wait for the future
+                if _clock:
+                    if (_next := _clock.catchUp (_tick)) != _tick:     # jump to the present
+                        _tick            = _next
+                        _curTime         = _tick * _interval
+                        _curLon, _rotLon = orbitPhase (_args, _iSat, _incDeg, _curTime)
 
-                    _computeAndWrite = _tDel <= _interval
+                    if (_computeAndWrite := _clock.due (_tick)) is None:
+                        sleepUntil (_clock.deadline (_tick), _args.spin)
+                        continue        # wait for the future
                 else:
                     _computeAndWrite = True
-                    _tDel            = _interval
 
-                if _computeAndWrite:
+                # Satellite intervals due this tick
+
+                _due = [_i for _i, _satInt in enumerate (_satInts) if _live[_i] and _tick % _satInt.stride == 0]
+
+                if _computeAndWrite and _due:
                     _repLon  = _wrapLongitude (_curLon)
                     _repLat  = 0.0
                     _repRad  = (_eMaxRadius + _args.altitude) * 1000.0  # meters
 
-                    _repLonV = _wrapLongitude (_repLon, 5.0)    # tangential line
-                    _repLatV = _repLat
-                    _repRadV = _repRad * cos (radians (5.0))
+                    # Calculate velocity vector
+
+                    _dX, _dY, _dZ = orbitalVelocity (_orbSpeed, _incDeg, _repLon, _lonOff + _rotLon)
 
                     # Transform the LLA
 
                     if _repLLATuple := _transformLLA (_repLon, _repLat, _repRad):
                         _repLon, _repLat, _repRad = _repLLATuple
-                        _xA, _yA, _zA             = _lla_to_ecef (_repLon, _repLat, _repRad)
                     else:
                         break
 
-                    # Transform velocity vector endpoint
+                    # Write records
 
-                    if _repLLAVTuple := _transformLLA (_repLonV, _repLatV, _repRadV):
-                        _repLonV, _repLatV, _repRadV = _repLLAVTuple
-                        _xVA, _yVA, _zVA             = _lla_to_ecef (_repLonV, _repLatV, _repRadV)
-                    else:
-                        break
-
-                    # Calculate velocity vector
-
-                    _vDist = dist ([_xA, _yA, _zA], [_xVA, _yVA, _zVA])     # Euclidean distance for normalization
+                    _nTicks += 1
 
-                    _dX = _orbSpeed * (_xVA - _xA) / _vDist
-                    _dY = _orbSpeed * (_yVA - _yA) / _vDist
-                    _dZ = _orbSpeed * (_zVA - _zA) / _vDist
-
-                    # Write record
-
-                    if not _callback (_curTime, _repLat, _repLon, _repRad / 1000.0 - _eMaxRadius, _dX, _dY, _dZ, _tDel):
-                        break
+                    for _i in _due:
+                        if not _callbacks[_i] (_curTime, _repLat, _repLon, _repRad / 1000.0 - _eMaxRadius, _dX, _dY, _dZ):
+                            _retire (_i)
+                        elif _clock:
+                            _satInts[_i].lateness.record (time.monotonic () - _clock.deadline (_tick))
 
                 # Increment time, distance, and baseline longitude
 
-                _tWant   += _interval
+                _tick    += 1
                 _curTime += _interval
                 _curLon   = _wrapLongitude (_curLon, _delLon)
                 _rotLon  += _delRotL
 
-            self.stoppedThread (_iPlane, _iSat, _interval)
+            self.countTicks (_nTicks, _curTime)
+
+            for _i, _satInt in enumerate (_satInts):
+                if _live[_i]:
+                    self.stoppedThread (_iPlane, _iSat, _satInt.interval)
+
+        # Generate orbital data for all of a stream's satellites with a single, vectorized engine,
+        # invoking each satellite interval's callback every <stride> ticks.  A generator (cf.,
+        # runTicks ()): yields None once its satellite intervals are registered, then, following
+        # start notification, the monotonic time of each subsequent tick.
+
+        def _genConstellation (_satInts: list, _callbacks: list, _kwargs: dict = {}):
+
+            def _retire (_i: int):
+                _live[_i] = False
+                self.stoppedThread (_satInts[_i].iPlane, _satInts[_i].iSat, _satInts[_i].interval)
+
+            _interval = _kwargs.get ('interval', _args.interval)
+            _engine   = OrbitEngine (_args, _interval)
+            _rows     = np.array ([_engine.rowOf (_satInt.iPlane, _satInt.iSat) for _satInt in _satInts])
+            _strides  = np.array ([_satInt.stride for _satInt in _satInts])
+            _live     = np.ones (len (_satInts), dtype = bool)
+            _tick     = 0
+
+            # Register the stream's satellite intervals and wait for start notification
+
+            with self._rLock:
+                for _satInt in _satInts:
+                    self._rThreads.add ((_satInt.iPlane, _satInt.iSat, _satInt.interval))
+
+            _debugPrint (f'Interval {_interval}: waiting for notification...')
+            yield None
+
+            _debugPrint (f'Interval {_interval}: received notification; processing...')
+
+            # Endpoints are paced from _args.start_time (from CLI or ZMQ pub) or now; file output and
+            # virtual time are unpaced
+
+            if _clock := _kwargs.get ('endpoint') and not _args.virtual_time and \
+                         TickClock (_interval, _args.catch_up, _args.start_time):
+                for _satInt in _satInts:
+                    _satInt.clock    = _clock
+                    _satInt.lateness = TickLateness ()
+
+            _nTicks  = 0        # computed positions
+            _endTime = float (_args.duration) if _args.duration else None
+
+            while not _endTime or _engine.curTime < _endTime:
+
+                for _i in np.flatnonzero (_live):
+                    if _satInts[_i] in self._stopSet:
+                        _retire (_i)
+
+                if not _live.any ():
+                    break
+
+                # Endpoint scheduling (cf., _genOrbit ())
+
+                if _clock:
+                    if (_next := _clock.catchUp (_tick)) != _tick:     # jump to the present
+                        _tick = _next
+                        _engine.seek (_tick * _interval)
+
+                    if (_computeAndWrite := _clock.due (_tick)) is None:
+                        yield _clock.deadline (_tick)       # wait for the future
+                        continue
+                else:
+                    _computeAndWrite = True
+
+                # Satellite intervals due this tick, and their (distinct) satellites' rows
+
+                if _computeAndWrite and (_iDue := np.flatnonzero (_live & (_tick % _strides == 0))).size:
+                    _tRows, _jDue = np.unique (_rows[_iDue], return_inverse = True)
+                    _valid, *_geo = _engine.tick (_tRows)
+                    _nTicks      += _tRows.size
+                    _lats, _lons, _alts, _dXs, _dYs, _dZs = (_a.tolist () for _a in _geo)
+
+                    # Write records
+
+                    for _i, _j in zip (_iDue.tolist (), _jDue.tolist ()):
+                        if not _valid[_j] or \
+                           not _callbacks[_i] (_engine.curTime, _lats[_j], _lons[_j], _alts[_j], _dXs[_j], _dYs[_j], _dZs[_j]):
+                            _retire (_i)
+                        elif _clock:
+                            _satInts[_i].lateness.record (time.monotonic () - _clock.deadline (_tick))     # per satellite, as published
+
+                # Increment time and baseline longitudes
+
+                _tick += 1
+                _engine.advance ()
+
+                if _computeAndWrite:
+                    yield _clock.deadline (_tick) if _clock else time.monotonic ()
+
+            self.countTicks (_nTicks, _engine.curTime)
+
+            for _i in np.flatnonzero (_live):
+                self.stoppedThread (_satInts[_i].iPlane, _satInts[_i].iSat, _satInts[_i].interval)
 
         _args = self._args
 
-        self.setup ()
+        setGeodesyBackend (_args.geodesy)
+        HttpPool.configure (_args.http_pool, _args.http_timeout, _args.http_in_flight, not _args.virtual_time)
 
-        # Gravitational force equation: F = m · g
-        # Orbital force equation:       F = m · v**2 / r
-        #
-        # Thus, g = v**2 / r  ->  v = sqrt (g · r)
+        self.setup ()
 
         # Orbital speed (kps) with equatorial orbit as reference
 
-        _orbSpeed = sqrt (_g * (_args.altitude + _eMaxRadius) * 1000.0) / 1000.0
+        _orbSpeed = orbitalSpeed (_args.altitude)
 
         # Orbital distance (km)
 
-        _orbDist = _360rad * (_args.altitude + _eMaxRadius)
+        _orbDist = orbitalDistance (_args.altitude)
 
         # Inter-satellite displacement (km)
 
@@ -536,15 +858,76 @@ Notes
         if _args.info:
             print (f'Information\n  tangential speed (kps): {_orbSpeed}\n  orbital distance (km): {_orbDist}\n  inter-satellite displacement (km): {_satDist}')
 
-        _target = _publishOrbit if _args.endpoint else _writeOrbit
+        # Parallel offline generation, and columnar (whole constellation) files
+
+        if (_args.processes or isColumnar (_args.format)) and not _args.endpoint:
+            if not _args.duration:
+                print ('ERROR: --processes and columnar formats require --duration')
+                return
+
+            _tStart = time.monotonic ()
+            try:
+                if isColumnar (_args.format):
+                    _rows = writeColumnar (_args, _fileName ('all', 'all'), _args.processes)
+                else:
+                    _rows = writeTraces   (_args,
+                                           {(_iPlane, _iSat): _fileName (_iPlane, _iSat) for _iPlane in range (1, _args.num_planes + 1)
+                                                                                         for _iSat   in range (1, _args.num_sats   + 1)},
+                                           _args.processes)
+            except ImportError as _e:   # pyarrow
+                print (f'ERROR: {_args.format}: {_e}')
+                return
+
+            if _args.info:
+                print (f'  {_rows} rows in {time.monotonic () - _tStart:.3f} s ({_args.processes} processes)')
+            return
+
+        if _args.engine != 'thread':
+            _target = _publishConstellation if _args.endpoint else _writeConstellation
+        else:
+            _target = _publishOrbit         if _args.endpoint else _writeOrbit
         self.startOrbit (_target, _args.num_planes, _args.num_sats)
 
         _debugPrint ("Main thread: all threads started.")
 
+        _tStart = time.monotonic ()
+
         self.startThreads (_args)
 
         _debugPrint ("Main thread: all threads finished.")
 
+        # Deliver the last positions
+
+        if not HttpPool.flush (_args.http_timeout):
+            print (f'WARNING: undelivered positions')
+
+        if _args.virtual_time:
+            _elapsed = max (time.monotonic () - _tStart, 1e-9)
+            print (f'Virtual time: {self._vTime:.1f} s simulated in {_elapsed:.3f} s ({self._vTime / _elapsed:.1f}x real time); '
+                   f'{self._vTicks} satellite ticks ({self._vTicks / _elapsed:.0f} ticks/s)')
+
+        if _args.info:
+            for _url, (_sent, _failed, _superseded) in HttpPool.stats ().items ():
+                print (f'  {_url}: {_sent} sent, {_failed} failed, {_superseded} superseded')
+
+            print (f'  satellite interval lock: {self._rLock.acquired} acquisitions, {self._rLock.contended} contended')
+
+            # Tick timing per orbit stream interval: satellites' published ticks' lateness pooled, and
+            # the streams' dropped and overrun ticks
+
+            _clocks = dict ()   # key: stream interval, val: ({<TickClock>}, [<TickLateness>])
+            with self._rLock:
+                for _satInt in self._threads.values ():
+                    if _satInt.clock:
+                        _iClocks, _iLates = _clocks.setdefault (_satInt.clock.interval, (set (), list ()))
+                        _iClocks.add (_satInt.clock)
+                        _iLates.append (_satInt.lateness)
+
+            for _interval, (_iClocks, _iLates) in sorted (_clocks.items ()):
+                _s = TickClock.stats (list (_iClocks), _iLates)
+                print (f'  stream interval {_interval}: {_s["ticks"]} satellite ticks; {_s["dropped"]} dropped, {_s["overruns"]} overruns (stream ticks); '
+                       f'satellite lateness (ms) mean {1000.0 * _s["mean"]:.3f}, max {1000.0 * _s["max"]:.3f}, jitter {1000.0 * _s["jitter"]:.3f}')
+
     def stoppedThread (self, _iPlane: int, _iSat: int, _interval: float):
         pass
 
@@ -0,0 +1,387 @@
+# Description
+#
+#   Vectorized circular orbit propagation for a whole constellation.
+#
+#   OrbitEngine keeps the state of every satellite sharing one sample
+#   interval in NumPy arrays (one row per plane/ordinal, plane-major) and
+#   advances all of them with a single batched step per tick.  Its results
+#   match those of the per-satellite OrbitApp._genOrbit () loop.
+#
+#   Since circular orbits are periodic in the rotating frame (apart from the
+#   longitudinal drift due to Earth's rotation), an engine may instead look
+#   up each tick in a cached ephemeris: one period of a plane's positions and
+#   velocities, sampled at a fixed resolution, interpolated, and shifted by
+#   the drift.
+#
+#   Ephemerides may also be shared among processes (e.g., the satellite and
+#   constellation containers of a host) as files (cf., EphemerisFile): one
+#   .npy file of all of a constellation's planes per orbital configuration,
+#   named by the configuration's hash, built (and written) by the first
+#   process that needs it and memory-mapped read-only by all of them.
+#
+#   An orbit's phase (cf., orbitPhase ()) is closed-form in time, so an
+#   engine may also seek (e.g., catch up) to any time without stepping
+#   through the intervening ticks.
+
+from   collections import OrderedDict
+import hashlib
+from   math import sqrt
+import os
+import tempfile
+from   threading import Lock
+
+import numpy as np
+from   scipy.spatial.transform import Rotation
+
+from   geodesy import _eMaxRadius, _g, _360deg, _360rad, sin, llaToECEF, ecefToLLA, _opsFor, _wrapLongitude, _wrapLongitudes
+
+#############
+# Functions #
+#############
+
+# Gravitational force equation: F = m · g
+# Orbital force equation:       F = m · v**2 / r
+#
+# Thus, g = v**2 / r  ->  v = sqrt (g · r)
+
+def orbitalSpeed (_altitude: float) -> float:       # kps with equatorial orbit as reference
+    return sqrt (_g * (_altitude + _eMaxRadius) * 1000.0) / 1000.0
+
+def orbitalDistance (_altitude: float) -> float:    # km
+    return _360rad * (_altitude + _eMaxRadius)
+
+# Velocity along a circular orbit, i.e., the derivative (scaled by the orbital speed) of
+#
+#   Rz (<node longitude>) · Rx (<inclination>) · (cos <longitude>, sin <longitude>, 0)
+#
+# with respect to <longitude>, the satellite's position within its uninclined orbit
+
+def orbitalVelocity (_orbSpeed: float, _incDeg, _lon, _nodeLon) -> tuple:     # ECEF (kps)
+    _ops = _opsFor (_lon)
+    _lon, _incDeg, _nodeLon = _ops.radians (_lon), _ops.radians (_incDeg), _ops.radians (_nodeLon)
+
+    _tX = -_ops.sin (_lon)
+    _tY =  _ops.cos (_lon) * _ops.cos (_incDeg)
+    _tZ =  _ops.cos (_lon) * _ops.sin (_incDeg)
+
+    _cosNode = _ops.cos (_nodeLon)
+    _sinNode = _ops.sin (_nodeLon)
+
+    return (_orbSpeed * (_cosNode * _tX - _sinNode * _tY),
+            _orbSpeed * (_sinNode * _tX + _cosNode * _tY),
+            _orbSpeed * _tZ)
+
+def orbitPhase (_args, _iSat, _incDeg, _time: float) -> tuple:
+    """
+    Return the phase at simulation time _time (seconds) of the _iSat
+    satellite(s) of plane(s) inclined by _incDeg (scalars or arrays):
+    their longitudes within their uninclined orbits and longitudinal
+    drifts due to Earth's rotation (degrees), as accumulated tick by
+    tick by OrbitEngine.advance () and OrbitApp._genOrbit ().
+    """
+    _ops     = _opsFor (_incDeg)
+    _simTime = _time * _args.time_multiplier
+    _curLon  = (_iSat - 1) * _360deg / float (_args.num_sats) + \
+               _360deg * orbitalSpeed (_args.altitude) * _simTime / orbitalDistance (_args.altitude)
+    _rotLon  = _360deg * _ops.sin (_ops.radians (_incDeg)) * _simTime / (24.0 * 60.0 * 60.0)
+
+    return _wrapLongitudes (_curLon) if isinstance (_curLon, np.ndarray) else _wrapLongitude (_curLon), _rotLon
+
+def planeGeometry (_args, _iPlane: int) -> tuple:   # inclination and longitudinal offset (degrees)
+    _lons = _args.longitude
+    _incs = _args.inclination
+
+    if _args.num_planes > 1:
+        _incRng = _incs[1] - _incs[0]
+        _incDeg = float (_iPlane - 1) * _incRng / float (_args.num_planes - 1) + _incs[0]
+        _lonRng = _lons[1] - _lons[0]
+        _lonOff = float (_iPlane - 1) * _lonRng / float (_args.num_planes - 1) + _lons[0]
+    else:
+        _incDeg = _incs[0]
+        _lonOff = _lons[0]
+
+    return _incDeg, _lonOff
+
+###########
+# Classes #
+###########
+
+class Ephemeris:        # one orbital period of a plane at <resolution> samples per orbit
+    __slots__ = ('lats', 'lons', 'alts', 'vels')
+
+    def __init__ (self, _lats: np.ndarray, _lons: np.ndarray, _alts: np.ndarray, _vels: np.ndarray):
+        self.lats = _lats
+        self.lons = _lons       # includes the plane's longitudinal offset
+        self.alts = _alts
+        self.vels = _vels       # (<resolution>, 3) ECEF velocities (kps)
+
+class EphemerisCache:   # bounded, least-recently-used, shared by all engines
+    MAX_TABLES = 64
+
+    _tables = OrderedDict ()    # key: (altitude, inclination, longitude, resolution), val: Ephemeris
+    _lock   = Lock ()
+
+    @classmethod
+    def get (cls, _key: tuple, _build) -> Ephemeris:
+        with cls._lock:
+            if (_ephemeris := cls._tables.get (_key)) is not None:
+                cls._tables.move_to_end (_key)
+                return _ephemeris
+
+        _ephemeris = _build ()
+
+        with cls._lock:
+            cls._tables[_key] = _ephemeris
+            while len (cls._tables) > cls.MAX_TABLES:
+                cls._tables.popitem (last = False)
+
+        return _ephemeris
+
+    @classmethod
+    def clear (cls):
+        with cls._lock:
+            cls._tables.clear ()
+
+class EphemerisFile:    # shared, memory-mapped (read-only) ephemeris tables
+    VERSION = 1                 # table layout; part of the hashed key
+
+    _tables = dict ()           # key: <path>, val: np.memmap
+    _lock   = Lock ()
+
+    @classmethod
+    def path (cls, _dir: str, _key: tuple) -> str:
+        return os.path.join (_dir, f'ephemeris-{hashlib.sha256 (repr ((cls.VERSION, ) + _key).encode ()).hexdigest ()[:16]}.npy')
+
+    @classmethod
+    def get (cls, _dir: str, _key: tuple, _build) -> np.ndarray:
+        """
+        Memory-map the tables for _key, first writing (atomically) those
+        returned by _build () when no process has yet.
+        """
+        _path = cls.path (_dir, _key)
+
+        with cls._lock:
+            if (_tables := cls._tables.get (_path)) is not None:
+                return _tables
+
+        if not os.path.exists (_path):
+            os.makedirs (_dir, exist_ok = True)
+            _fd, _tmpPath = tempfile.mkstemp (dir = _dir, suffix = '.tmp')
+            try:
+                with os.fdopen (_fd, 'wb') as _fOut:
+                    np.save (_fOut, _build ())
+                os.chmod   (_tmpPath, 0o644)      # readable by other containers' users
+                os.replace (_tmpPath, _path)      # concurrent builders write identical tables
+            except:
+                os.remove (_tmpPath)
+                raise
+
+        _tables = np.load (_path, mmap_mode = 'r')
+
+        with cls._lock:
+            return cls._tables.setdefault (_path, _tables)
+
+class OrbitEngine:
+
+    def __init__ (self, _args, _interval: float):
+        _numPlanes = _args.num_planes
+        _numSats   = _args.num_sats
+
+        self.interval = _interval
+        self.curTime  = 0.0
+
+        # Satellite rows (plane-major)
+
+        self.iPlanes = np.repeat (np.arange (1, _numPlanes + 1), _numSats)
+        self.iSats   = np.tile   (np.arange (1, _numSats   + 1), _numPlanes)
+
+        _geometry    = [planeGeometry (_args, _iPlane) for _iPlane in range (1, _numPlanes + 1)]
+        self.incDeg  = np.repeat (np.array ([_pg[0] for _pg in _geometry]), _numSats)
+        self.lonOff  = np.repeat (np.array ([_pg[1] for _pg in _geometry]), _numSats)
+        self._rotInc = Rotation.from_euler ('x', np.radians (self.incDeg)[:, np.newaxis])
+
+        # Delta time and time sample distance (km)
+
+        _orbSpeed = orbitalSpeed    (_args.altitude)
+        _delTime  = _interval * _args.time_multiplier
+        _delDist  = _orbSpeed * _delTime
+
+        # Baseline longitudinal delta
+
+        self.delLon = _360deg * _delDist / orbitalDistance (_args.altitude)
+
+        # Longitudinal delta due to Earth's rotation
+
+        self.delRotL = np.array ([_360deg * sin (_incDeg) * _interval * _args.time_multiplier / (24.0 * 60.0 * 60.0)
+                                  for _incDeg in self.incDeg])
+
+        self.curLon = (self.iSats - 1).astype (float) * _360deg / float (_numSats)
+        self.rotLon = np.zeros (len (self.iSats))
+
+        self._args     = _args
+        self._numSats  = _numSats
+        self._orbSpeed = _orbSpeed
+        self._repRad   = (_eMaxRadius + _args.altitude) * 1000.0     # meters
+
+        # Provisionally look up ticks in per-plane ephemerides (keyed by the plane's geometry), shared
+        # as a file (keyed by all of the planes' geometries) when given a directory
+
+        if _resolution := getattr (_args, 'ephemeris', 0):
+            if _dir := getattr (_args, 'ephemeris_dir', None):
+                _tables = EphemerisFile.get (_dir,
+                                             (_args.altitude, tuple (self.incDeg[::_numSats].tolist ()), tuple (self.lonOff[::_numSats].tolist ()),
+                                              _resolution, getattr (_args, 'geodesy', 'pyproj')),
+                                             lambda: self._ephemerisTables (_args, _resolution))
+            else:
+                _tables = self._ephemerisTables (_args, _resolution)
+
+            # (<plane>, <sample>) views
+
+            self._ephLats = _tables[..., 0]
+            self._ephAlts = _tables[..., 1]
+            self._ephNXs  = _tables[..., 2]
+            self._ephNYs  = _tables[..., 3]
+            self._ephVels = _tables[..., 4:7]
+
+        self._resolution = _resolution
+
+    def __len__ (self):
+        return len (self.iSats)
+
+    def rowOf (self, _iPlane: int, _iSat: int) -> int:
+        return (_iPlane - 1) * self._numSats + _iSat - 1
+
+    def _transformLLA (self, _rows: np.ndarray, _lons: np.ndarray, _lats: np.ndarray, _alts: np.ndarray, _rotLons: np.ndarray):
+
+        # Incline the orbital planes
+
+        if (_incl := self.incDeg[_rows] != 0.0).any ():
+            _xA, _yA, _zA = llaToECEF (_lons[_incl], _lats[_incl], _alts[_incl])
+            _vRot         = self._rotInc[_rows[_incl]].apply (np.column_stack ((_xA, _yA, _zA)))
+
+            _lons, _lats, _alts = _lons.copy (), _lats.copy (), _alts.copy ()
+            _lons[_incl], _lats[_incl], _alts[_incl] = ecefToLLA (_vRot[:, 0], _vRot[:, 1], _vRot[:, 2])
+
+        # Offset the orbital planes
+
+        return _wrapLongitudes (_lons, self.lonOff[_rows], _rotLons), _lats, _alts
+
+    def tick (self, _rows: np.ndarray) -> tuple:
+        """
+        Compute the current position and velocity of the given rows.
+        Returns (<valid mask>, lat, lon, alt, delx, dely, delz) arrays
+        aligned with _rows; rows whose transformation is not finite
+        are cleared in <valid mask>.
+        """
+        if self._resolution:
+            return self._lookup (_rows)
+
+        return self._positions (_rows, self.curLon[_rows], self.rotLon[_rows])
+
+    def trace (self, _row: int, _times: np.ndarray) -> tuple:
+        """
+        Compute a satellite's positions and velocities at the given
+        simulation times (e.g., a whole trace) at once, independently of
+        the engine's current time.  Returns (<valid mask>, lat, lon, alt,
+        delx, dely, delz) arrays aligned with _times (cf., tick ()).
+        """
+        _curLons, _rotLons = orbitPhase (self._args, self.iSats[_row], self.incDeg[_row], _times)
+
+        return self._positions (np.full (len (_times), _row), _curLons, _rotLons)
+
+    def _ephemerisTables (self, _args, _resolution: int) -> np.ndarray:
+        """
+        Return the planes' ephemerides as a (<plane>, <sample>, 7) array of
+        latitudes, altitudes, longitudes' unit vectors (x and y), and
+        velocities (x, y, and z).
+        """
+        _ephs = [EphemerisCache.get ((_args.altitude, self.incDeg[_row], self.lonOff[_row], _resolution),
+                                     lambda _row = _row: self._sampleOrbit (_row, _resolution))
+                 for _row in range (0, len (self), self._numSats)]
+
+        _lats = np.stack ([_eph.lats for _eph in _ephs])
+
+        # Longitudes as equatorial-plane projections of unit position vectors, which interpolate
+        # across the antimeridian and the poles
+
+        _lons    = np.radians (np.stack ([_eph.lons for _eph in _ephs]))
+        _cosLats = np.cos (np.radians (_lats))
+
+        return np.concatenate ((np.stack ((_lats,
+                                           np.stack ([_eph.alts for _eph in _ephs]),
+                                           _cosLats * np.cos (_lons),
+                                           _cosLats * np.sin (_lons)), axis = -1),
+                                np.stack ([_eph.vels for _eph in _ephs])), axis = -1)
+
+    def _sampleOrbit (self, _row: int, _resolution: int) -> Ephemeris:
+        _rows  = np.full (_resolution, _row)
+        _valid, _lats, _lons, _alts, _dX, _dY, _dZ = self._positions (_rows,
+                                                                      np.arange (_resolution) * _360deg / _resolution,
+                                                                      np.zeros  (_resolution))
+        return Ephemeris (_lats, _lons, _alts, np.column_stack ((_dX, _dY, _dZ)))
+
+    def _lookup (self, _rows: np.ndarray) -> tuple:
+        _iPlanes = self.iPlanes[_rows] - 1
+        _rotLons = self.rotLon[_rows]
+
+        # Bracketing samples and interpolation weights
+
+        _x  = np.mod (self.curLon[_rows], _360deg) * self._resolution / _360deg
+        _i0 = np.floor (_x).astype (int)
+        _w  = _x - _i0
+        _i0 = _i0 % self._resolution
+        _i1 = (_i0 + 1) % self._resolution
+
+        _lats = self._ephLats[_iPlanes, _i0] + _w * (self._ephLats[_iPlanes, _i1] - self._ephLats[_iPlanes, _i0])
+        _alts = self._ephAlts[_iPlanes, _i0] + _w * (self._ephAlts[_iPlanes, _i1] - self._ephAlts[_iPlanes, _i0])
+
+        _nXs  = self._ephNXs[_iPlanes, _i0] + _w * (self._ephNXs[_iPlanes, _i1] - self._ephNXs[_iPlanes, _i0])
+        _nYs  = self._ephNYs[_iPlanes, _i0] + _w * (self._ephNYs[_iPlanes, _i1] - self._ephNYs[_iPlanes, _i0])
+        _lons = _wrapLongitudes (np.degrees (np.arctan2 (_nYs, _nXs)), _rotLons)
+
+        # Interpolate, renormalize, and rotate (about the polar axis) velocities by the drift
+
+        _vels  = self._ephVels[_iPlanes, _i0] + _w[:, np.newaxis] * (self._ephVels[_iPlanes, _i1] - self._ephVels[_iPlanes, _i0])
+        _vels *= self._orbSpeed / np.linalg.norm (_vels, axis = 1)[:, np.newaxis]
+        _cos   = np.cos (np.radians (_rotLons))
+        _sin   = np.sin (np.radians (_rotLons))
+
+        _dX = _cos * _vels[:, 0] - _sin * _vels[:, 1]
+        _dY = _sin * _vels[:, 0] + _cos * _vels[:, 1]
+        _dZ = _vels[:, 2]
+
+        return np.isfinite (_lons), _lats, _lons, _alts, _dX, _dY, _dZ
+
+    def _positions (self, _rows: np.ndarray, _curLons: np.ndarray, _rotLons: np.ndarray) -> tuple:
+        _repLons = _wrapLongitudes (_curLons)
+        _repLats = np.zeros (len (_rows))
+        _repRads = np.full  (len (_rows), self._repRad)
+
+        # Calculate velocity vectors
+
+        _dX, _dY, _dZ = orbitalVelocity (self._orbSpeed, self.incDeg[_rows], _repLons, self.lonOff[_rows] + _rotLons)
+
+        # Transform the LLAs
+
+        _repLons, _repLats, _repRads = self._transformLLA (_rows, _repLons, _repLats, _repRads, _rotLons)
+
+        if not (_valid := np.isfinite (_repLons)).all ():
+            for _row in _rows[~_valid]:
+                print (f'ERROR: ({self.iPlanes[_row]} {self.iSats[_row]} @ {self.curTime}) non-finite transformation')
+
+        return _valid, _repLats, _repLons, _repRads / 1000.0 - _eMaxRadius, _dX, _dY, _dZ
+
+    def advance (self):
+
+        # Increment time, distance, and baseline longitude
+
+        self.curTime += self.interval
+        self.curLon   = _wrapLongitudes (self.curLon, self.delLon)
+        self.rotLon  += self.delRotL
+
+    def seek (self, _time: float):
+        """
+        Move every satellite to simulation time _time (seconds) in O(1).
+        """
+        self.curTime             = _time
+        self.curLon, self.rotLon = orbitPhase (self._args, self.iSats, self.incDeg, _time)
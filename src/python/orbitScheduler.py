@@ -0,0 +1,221 @@
+# Description
+#
+#   Deadline-ordered execution of periodic tasks from a single thread.
+#
+#   A task is a callable that performs one tick and returns the monotonic
+#   time (cf., time.monotonic ()) of its next tick, or None when it is
+#   finished.  Due tasks run on the scheduler thread or, when the scheduler
+#   has workers, on a small, fixed thread pool.  A task is never run
+#   concurrently with itself: it is rescheduled only after its tick returns.
+#
+#   TickClock paces an orbit stream: tick <n>'s deadline is <start> + <n> *
+#   <interval>, so time spent computing and publishing a tick never delays
+#   later ones (no drift).  A tick whose successor is already due has been
+#   missed (an overrun) and is handled per the clock's catch-up policy:
+#
+#     coalesce  drop missed ticks; publish the latest due tick at once
+#     skip      drop missed ticks, and the latest due one, resuming at the
+#               next deadline
+#     burst     publish every missed tick, back to back
+#
+#   The dropping policies jump straight to the latest due tick (cf.,
+#   catchUp ()), however far behind the stream is (e.g., a restarted
+#   process resuming an orbit started long ago).
+#
+#   Waits may end with a busy-wait (spin; cf., sleepUntil ()) of up to a
+#   few milliseconds, trading CPU for sub-millisecond accuracy.
+
+from   concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+from   threading import Condition
+import time
+import traceback
+
+#############
+# Functions #
+#############
+
+def sleepUntil (_deadline: float, _spin: float = 0.0):
+    """
+    Sleep until the monotonic _deadline, busy-waiting its last _spin
+    seconds.
+    """
+    if (_wait := _deadline - time.monotonic () - _spin) > 0.0:
+        time.sleep (_wait)
+
+    while time.monotonic () < _deadline:
+        pass
+
+###########
+# Classes #
+###########
+
+class TickLateness:    # published ticks' lateness (seconds past their deadlines)
+    __slots__ = ('ticks', 'maxLate', '_sumLate', '_sumLate2')
+
+    def __init__ (self):
+        self.ticks     = 0
+        self.maxLate   = 0.0
+        self._sumLate  = 0.0
+        self._sumLate2 = 0.0
+
+    def record (self, _late: float):
+        self.ticks     += 1
+        self.maxLate    = max (self.maxLate, _late)
+        self._sumLate  += _late
+        self._sumLate2 += _late * _late
+
+    @staticmethod
+    def stats (_latenesses: list) -> dict:
+        """
+        Pool the lateness (count, mean, max, and jitter, viz., standard
+        deviation; seconds).
+        """
+        _ticks = sum ([_l.ticks for _l in _latenesses])
+        _mean  = sum ([_l._sumLate  for _l in _latenesses]) / _ticks if _ticks else 0.0
+        _mean2 = sum ([_l._sumLate2 for _l in _latenesses]) / _ticks if _ticks else 0.0
+
+        return {'ticks':  _ticks,
+                'mean':   _mean,
+                'max':    max ([_l.maxLate for _l in _latenesses], default = 0.0),
+                'jitter': max (_mean2 - _mean * _mean, 0.0) ** 0.5}
+
+
+class TickClock:
+    POLICIES = ('coalesce', 'skip', 'burst')
+
+    def __init__ (self, _interval: float, _policy: str = 'coalesce', _start: float = None):
+        """
+        _start is tick 0's wall-clock time (cf., time.time ()); default:
+        now.
+        """
+        self.interval  = _interval
+        self.policy    = _policy
+        self.start     = time.monotonic () + (0.0 if _start is None else _start - time.time ())
+
+        self.lateness  = TickLateness ()    # published ticks (when due ())
+        self.dropped   = 0
+        self.overruns  = 0          # missed deadlines
+        self._resync   = False      # 'skip': drop ticks until the next deadline
+
+    def deadline (self, _tick: int) -> float:
+        return self.start + _tick * self.interval
+
+    def catchUp (self, _tick: int) -> int:
+        """
+        Return the tick to run next: _tick or, when later deadlines have
+        passed as well and the policy drops missed ticks, the latest due
+        one.
+        """
+        if self.policy == 'burst' or (_late := time.monotonic () - self.deadline (_tick)) < self.interval:
+            return _tick
+
+        _missed = int (_late / self.interval)
+
+        self.overruns += _missed
+        self.dropped  += _missed
+        self._resync   = self.policy == 'skip'
+
+        return _tick + _missed
+
+    def due (self, _tick: int) -> bool | None:
+        """
+        Return None when _tick's deadline is in the future, otherwise
+        whether to publish it.
+        """
+        if (_late := time.monotonic () - self.deadline (_tick)) < 0.0:
+            return None
+
+        if _late >= self.interval:              # _tick + 1 is due, too
+            self.overruns += 1
+            if self.policy != 'burst':
+                self.dropped += 1
+                self._resync  = self.policy == 'skip'
+                return False
+        elif self._resync:
+            self.dropped += 1
+            self._resync  = False
+            return False
+
+        self.lateness.record (_late)
+
+        return True
+
+    @staticmethod
+    def stats (_clocks: list, _latenesses: list = None) -> dict:
+        """
+        Pool the clocks' dropped and overrun tick counts with the lateness
+        (cf., TickLateness.stats ()) of _latenesses (default: the clocks'
+        own published ticks').
+        """
+        _stats = TickLateness.stats ([_clock.lateness for _clock in _clocks] if _latenesses is None else _latenesses)
+
+        _stats['dropped']  = sum ([_clock.dropped  for _clock in _clocks])
+        _stats['overruns'] = sum ([_clock.overruns for _clock in _clocks])
+
+        return _stats
+
+
+class OrbitScheduler:
+
+    def __init__ (self, _workers: int = 0, _spin: float = 0.0):
+        self._heap    = list ()                 # (<deadline>, <sequence #>, <task>)
+        self._seq     = itertools.count ()      # FIFO tie-breaker for equal deadlines
+        self._cond    = Condition ()
+        self._pending = 0                       # scheduled or running tasks
+        self._spin    = _spin                   # cf., sleepUntil ()
+        self._pool    = ThreadPoolExecutor (_workers, thread_name_prefix = 'Orbit worker') if _workers > 0 else None
+
+    def __len__ (self):
+        return self._pending
+
+    def schedule (self, _task, _deadline: float = None):
+        with self._cond:
+            self._pending += 1
+            self._push (_task, _deadline)
+
+    def _push (self, _task, _deadline: float):     # caller holds self._cond
+        heapq.heappush (self._heap, (time.monotonic () if _deadline is None else _deadline, next (self._seq), _task))
+        self._cond.notify ()
+
+    def _invoke (self, _task):
+        try:
+            _deadline = _task ()
+        except Exception:
+            print (f'ERROR: scheduled task failed:\n{traceback.format_exc ()}')
+            _deadline = None
+
+        with self._cond:
+            if _deadline is None:
+                self._pending -= 1
+                self._cond.notify_all ()
+            else:
+                self._push (_task, _deadline)
+
+    def run (self):
+        """
+        Run due tasks until every scheduled task has finished.
+        """
+        while True:
+            with self._cond:
+                while not self._heap:
+                    if not self._pending:
+                        if self._pool:
+                            self._pool.shutdown ()
+                        return
+                    self._cond.wait ()
+
+                _deadline, _, _task = self._heap[0]
+                if (_wait := _deadline - time.monotonic ()) > self._spin:
+                    self._cond.wait (_wait - self._spin)    # an earlier deadline may be pushed meanwhile
+                    continue
+
+                heapq.heappop (self._heap)
+
+            sleepUntil (_deadline, self._spin)
+
+            if self._pool:
+                self._pool.submit (self._invoke, _task)
+            else:
+                self._invoke (_task)
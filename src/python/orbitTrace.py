@@ -0,0 +1,191 @@
+# Description
+#
+#   Parallel offline orbit generation (cf., orbitApp.py without endpoints)
+#   and columnar trace files.
+#
+#   Satellites are distributed among a pool of worker processes, each of
+#   which computes a satellite's whole --duration trace as arrays (cf.,
+#   OrbitEngine.trace ()) and writes it in bulk: CHUNK rows at a time to the
+#   satellite's CSV file or, for a columnar file, into the satellite's slice
+#   of one memory-mapped .npy file for the whole constellation.  Simulation
+#   times accumulate interval by interval, as in OrbitApp._genOrbit (), so
+#   traces have the same rows.
+#
+#   Columnar files (.npy or, with pyarrow, .parquet) hold TRACE_DTYPE
+#   records, satellite-major (plane, ordinal, then time); readTraces ()
+#   loads them (.npy memory-mapped) as NumPy record arrays, e.g.,
+#
+#     _traces = readTraces ('orbits.npy')
+#     _lats   = _traces[(_traces.plane == 1) & (_traces.ordinal == 2)].lat
+
+from   concurrent.futures import ProcessPoolExecutor
+import csv
+import os
+import time
+
+import numpy as np
+
+from   geodesy     import setGeodesyBackend
+from   orbitEngine import OrbitEngine
+
+#############
+# Constants #
+#############
+
+CHUNK = 65536           # CSV rows per bulk write
+
+TRACE_DTYPE = np.dtype ([('plane', 'i4'), ('ordinal', 'i4'), ('time', 'f8'),
+                         ('lat',   'f8'), ('lon',     'f8'), ('alt',  'f8'),
+                         ('delx',  'f8'), ('dely',    'f8'), ('delz', 'f8')])
+
+COLUMNAR = ('.npy', '.parquet')     # columnar file name extensions
+
+_engine = None          # worker process's OrbitEngine; cf., _initWorker ()
+
+#############
+# Functions #
+#############
+
+def isColumnar (_fileName: str) -> bool:
+    return _fileName.endswith (COLUMNAR)
+
+def _traceTimes (_interval: float, _duration: float) -> np.ndarray:     # sequentially accumulated, < _duration
+    _times = np.cumsum (np.concatenate (([0.0], np.full (int (_duration / _interval) + 1, _interval))))
+
+    return _times[_times < _duration]
+
+def _initWorker (_args):
+    global _engine
+
+    setGeodesyBackend (_args.geodesy)
+    _engine = OrbitEngine (_args, _args.interval)
+
+def _writeTrace (_iPlane: int, _iSat: int, _fileName: str, _duration: float, _realTime: bool) -> int:
+    _row   = _engine.rowOf (_iPlane, _iSat)
+    _times = _traceTimes (_engine.interval, _duration)
+    _rows  = 0
+
+    try:
+        with open (_fileName, 'w', newline = '') as _fOut:
+            _csvOut = csv.writer (_fOut)
+
+            for _i0 in range (0, len (_times), CHUNK):
+                _cTimes = _times[_i0:_i0 + CHUNK]
+
+                _valid, _lats, _lons, _alts, *_ = _engine.trace (_row, _cTimes)
+
+                # Stop at the first non-finite transformation (cf., OrbitApp._genOrbit ())
+
+                if _stop := not _valid.all ():
+                    _n      = np.argmin (_valid)
+                    _cTimes = _cTimes[:_n]
+                    _lats, _lons, _alts = _lats[:_n], _lons[:_n], _alts[:_n]
+
+                _columns = [np.full (len (_cTimes), _iPlane).tolist (), np.full (len (_cTimes), _iSat).tolist ()]
+                if _realTime:
+                    _columns.append (np.full (len (_cTimes), time.time ()).tolist ())
+                _columns += [_cTimes.tolist (), _lats.tolist (), _lons.tolist (), _alts.tolist ()]
+
+                _csvOut.writerows (zip (*_columns))
+
+                _rows += len (_cTimes)
+                if _stop:
+                    break
+    except OSError:     # ePerm
+        pass
+
+    return _rows
+
+def _fillTrace (_iPlane: int, _iSat: int, _fileName: str, _offset: int, _duration: float) -> int:
+    _traces = np.lib.format.open_memmap (_fileName, mode = 'r+')
+    _times  = _traceTimes (_engine.interval, _duration)
+    _slice  = _traces[_offset:_offset + len (_times)]
+
+    _valid, *_columns = _engine.trace (_engine.rowOf (_iPlane, _iSat), _times)
+    _valid            = np.logical_and.accumulate (_valid)     # NaN from the first non-finite transformation
+
+    _slice['plane']   = _iPlane
+    _slice['ordinal'] = _iSat
+    _slice['time']    = _times
+    for _name, _column in zip (TRACE_DTYPE.names[3:], _columns):
+        _slice[_name] = np.where (_valid, _column, np.nan)
+
+    _traces.flush ()
+
+    return int (_valid.sum ())
+
+def _runTasks (_args, _processes: int, _task, _vargsList: list) -> int:
+    if not _processes:
+        _initWorker (_args)
+        return sum ([_task (*_vargs) for _vargs in _vargsList])
+
+    with ProcessPoolExecutor (_processes, initializer = _initWorker, initargs = (_args, )) as _pool:
+        _futures = [_pool.submit (_task, *_vargs) for _vargs in _vargsList]
+
+        return sum ([_future.result () for _future in _futures])
+
+def writeTraces (_args, _fileNames: dict, _processes: int) -> int:
+    """
+    Write the satellites' CSV traces (_fileNames; key: (iPlane, iSat),
+    val: <file name>) with a pool of _processes workers (0: in this
+    process); returns the number of rows written.
+    """
+    return _runTasks (_args, _processes, _writeTrace,
+                      [(_iPlane, _iSat, _fileName, float (_args.duration), _args.real_time)
+                       for (_iPlane, _iSat), _fileName in _fileNames.items ()])
+
+def writeColumnar (_args, _fileName: str, _processes: int) -> int:
+    """
+    Write the constellation's traces to one columnar file (.npy or
+    .parquet) with a pool of _processes workers (0: in this process);
+    returns the number of (finite) rows written.
+    """
+    _satellites = [(_iPlane, _iSat) for _iPlane in range (1, _args.num_planes + 1) for _iSat in range (1, _args.num_sats + 1)]
+    _nTimes     = len (_traceTimes (_args.interval, float (_args.duration)))
+    _npyName    = _fileName if _fileName.endswith ('.npy') else f'{_fileName}.tmp.npy'
+
+    if _npyName != _fileName:
+        import pyarrow.parquet      # optional; fail before computing
+
+    np.lib.format.open_memmap (_npyName, mode = 'w+', dtype = TRACE_DTYPE, shape = (len (_satellites) * _nTimes, )).flush ()
+
+    _rows = _runTasks (_args, _processes, _fillTrace,
+                       [(_iPlane, _iSat, _npyName, _i * _nTimes, float (_args.duration)) for _i, (_iPlane, _iSat) in enumerate (_satellites)])
+
+    if _npyName != _fileName:
+        try:
+            saveTraces (_fileName, np.load (_npyName, mmap_mode = 'r'))
+        finally:
+            os.remove (_npyName)
+
+    return _rows
+
+def saveTraces (_fileName: str, _traces: np.ndarray | list):
+    """
+    Save TRACE_DTYPE records (or tuples) to a columnar (.npy or .parquet)
+    file.
+    """
+    _traces = np.asarray (_traces, dtype = TRACE_DTYPE)
+
+    if _fileName.endswith ('.npy'):
+        np.save (_fileName, _traces)
+        return
+
+    import pyarrow                  # optional
+    import pyarrow.parquet
+
+    pyarrow.parquet.write_table (pyarrow.table ({_name: np.ascontiguousarray (_traces[_name]) for _name in TRACE_DTYPE.names}), _fileName)
+
+def readTraces (_fileName: str) -> np.recarray:
+    """
+    Read a columnar (.npy or .parquet) file's TRACE_DTYPE records; .npy
+    files are memory-mapped (read-only).
+    """
+    if _fileName.endswith ('.npy'):
+        return np.load (_fileName, mmap_mode = 'r').view (np.recarray)
+
+    import pyarrow.parquet          # optional
+
+    _table = pyarrow.parquet.read_table (_fileName)
+
+    return np.rec.fromarrays ([_table.column (_name).to_numpy () for _name in TRACE_DTYPE.names], dtype = TRACE_DTYPE)
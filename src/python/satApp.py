@@ -7,15 +7,15 @@ from   threading import Thread, Event
 import time     # .time (), .sleep ()
 from   typing import override
 
-import requests
-
 import ZmqSubscriber
 from   ZmqPPWrapper import ZmqPPWrapperType
 
 from   CLICommand import CLICommand
 
 from   jsonArgParse import inRangeType, rangeType, httpEndpoint, satAppArgs, hilArgs
+from   httpPool     import HttpPool
 from   orbitApp     import OrbitApp
+from   orbitTrace   import TRACE_DTYPE, isColumnar, saveTraces
 
 
 class SatApp (OrbitApp):
@@ -67,6 +67,7 @@ class SatApp (OrbitApp):
 
         def __init__ (self, _outerObj, _geoKey: tuple):
             self._real_time = _outerObj._args.real_time
+            self._records   = None      # columnar formats' buffered rows; cf., _close ()
 
             _fName = _outerObj._args.format.replace ('{plane}',      str (_geoKey[0]))   \
                                            .replace ('{ordinal}',    str (_geoKey[1]))   \
@@ -74,6 +75,13 @@ class SatApp (OrbitApp):
                                            .replace ('{num-sats}',   str (_outerObj._args.num_sats)) \
                                            .replace ('{num-planes}', str (_outerObj._args.num_planes))
 
+            if isColumnar (_fName):
+                self._fName   = _fName
+                self._records = list ()
+                self._fOut    = None
+                self._csvOut  = None
+                return
+
             try:
                 self._fOut   = open (_fName, 'w', newline = '')
                 self._csvOut = csv.writer (self._fOut)
@@ -82,7 +90,10 @@ class SatApp (OrbitApp):
                 self._csvOut = None
 
         def _writeRow (self, _geoDict):
-            if self._csvOut:    # _close () check
+            if self._records is not None:
+                self._records.append (tuple ([_geoDict.get (_name) for _name in TRACE_DTYPE.names]))
+
+            elif self._csvOut:  # _close () check
                 _row = list ([_geoDict.get ('plane'), _geoDict.get ('ordinal')])
                 if self._real_time:
                     _row += [time.time ()]
@@ -92,6 +103,13 @@ class SatApp (OrbitApp):
                 self._csvOut.writerow (_row)
 
         def _close (self):
+            if self._records is not None:
+                try:
+                    saveTraces (self._fName, self._records)
+                except Exception as _e:
+                    print (f'ERROR: {self._fName}: {_e}')
+                self._records = None
+
             self._csvOut = None         # disable _writeRow ()
             if self._fOut:
                 self._fOut.close ()
@@ -147,9 +165,7 @@ class SatApp (OrbitApp):
 
         elif _topic == 'stop':
             if _checkPlaneOrdinalClass ():
-                with self._rLock:
-                    for _orThread in self.threadsWith (self._iPlane, self._iSat):
-                        self._stopSet.add (_orThread)
+                self.stopSatIntervals (self.threadsWith (self._iPlane, self._iSat))
 
                 self._DebugFunc._closeWrites ()
                 if not self._zmq_start.is_set ():
@@ -161,26 +177,18 @@ class SatApp (OrbitApp):
 
         elif _topic == 'debug':
             if self._debug_cap and _checkPlaneOrdinal ():
-                with self._rLock:
-                    for _orThread in self.threadsWith (self._iPlane, self._iSat):
-                        if   _msg.get ('enable', True):
-                            self._debugFn[_orThread] = self._DebugFunc._writeGeoDict
-                        elif _orThread in self._debugFn:
-                            del self._debugFn[_orThread]
+                self.setModes (self.threadsWith (self._iPlane, self._iSat),
+                               debugFn = self._DebugFunc._writeGeoDict if _msg.get ('enable', True) else None)
 
         # Enable or disable exfiltration
 
         elif _topic == 'exfilt':
             if _checkPlaneOrdinal ():
-                with self._rLock:
-                    for _orThread in self.threadsWith (self._iPlane, self._iSat):
-                        if   _msg.get ('enable', True):
-                            self._exfiltFn[_orThread] = self._exfiltrate
-                        elif _orThread in self._exfiltFn:
-                            del self._exfiltFn[_orThread]
+                self.setModes (self.threadsWith (self._iPlane, self._iSat),
+                               exfiltFn = self._exfiltrate if _msg.get ('enable', True) else None)
 
     def _postRequest (self, _action: str, _dSat: dict):
-        return requests.post (os.path.join (self._q_endpoint, _action), json = _dSat)
+        return HttpPool.post (os.path.join (self._q_endpoint, _action), _dSat)
 
     @override
     def setup (self):
@@ -208,21 +216,11 @@ class SatApp (OrbitApp):
                 self._iPlane = inRangeType (_sPlane, 1, _numPlanes, _openRange = False)
                 self._iSat   = inRangeType (_sSat,   1, _numSats,   _openRange = False)
 
-                # Iterate over interval dict entries
-
-                for _interval, _endpoint in self.epArgs.items ():
-                    _nvargs = {'interval': _interval,
-                               'endpoint': _endpoint,
-                               'hil':      _HZN_NODE_ID
-                              }
-                    _thread = Thread (target = _target,
-                                      name   = f'Gen node #{self._iSat}',
-                                      args   = (self._iPlane, self._iSat, _nvargs),
-                                      daemon = True)
-                    with self._rLock:
-                        self._threads[(self._iPlane, self._iSat, _interval)] = _thread
-
-                    _thread.start ()
+                self.startSatellites (_target, [(self._iPlane, self._iSat)], {'hil': _HZN_NODE_ID})
+
+                # Iterate over satellite intervals
+
+                for _iPlane, _iSat, _interval in list (self._threads.keys ()):
 
                     # Advertise satellite interval start to Q controller
 
@@ -0,0 +1,9 @@
+# Description
+#
+#   pytest configuration: the modules under test are flat in src/python
+#   (the Dockerfiles copy them to the applications' working directory).
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (os.path.abspath (__file__)), '..', '..', 'src', 'python'))
@@ -0,0 +1,110 @@
+# Description
+#
+#   Accuracy of geodesy.py's closed-form (numpy) WGS 84 conversions against
+#   the PROJ (pyproj) backend.
+
+import numpy as np
+import pytest
+
+import geodesy
+from   geodesy import _numpyLLAToECEF, _numpyECEFToLLA, _pyprojLLAToECEF, _pyprojECEFToLLA
+
+# geodetic -> ECEF is closed-form in both backends
+
+ECEF_TOL     = 1.0e-6   # m
+
+# PROJ's ECEF -> geodetic is iterative, converged to centimeters (worse
+# than the closed form; cf., test_roundTrip ())
+
+PROJ_LAT_TOL = 1.0e-6   # degrees (~11 cm)
+PROJ_ALT_TOL = 0.05     # m, plus
+PROJ_ALT_REL = 1.0e-9   # of the altitude
+
+# Closed-form round trip
+
+LAT_TOL      = 1.0e-9   # degrees (~0.1 mm)
+LON_TOL      = 1.0e-9   # degrees
+ALT_TOL      = 1.0e-6   # m
+
+############
+# Fixtures #
+############
+
+@pytest.fixture
+def randomLLA ():
+    _rng = np.random.default_rng (20240601)
+    _n   = 10000
+    return (_rng.uniform (-180.0, 180.0, _n),
+            np.degrees (np.arcsin (_rng.uniform (-1.0, 1.0, _n))),     # uniform over the sphere
+            _rng.uniform (-1.0e3, 2.0e6, _n))                           # below sea level through LEO/MEO
+
+@pytest.fixture
+def polarHighLLA ():
+    _lats = np.array ([90.0, -90.0, 89.999999, -89.999999, 89.9, -89.9, 0.0, 45.0, 0.0, 89.999999])
+    _lons = np.array ([0.0, 0.0, 12.5, -170.0, 179.999, -179.999, 0.0, -45.0, 90.0, 180.0])
+    _alts = np.array ([550.0e3, 550.0e3, 1.2e6, 1.2e6, 3.6e7, 3.6e7, 3.5786e7, 4.0e8, 1.0e9, 0.0])     # GEO, lunar, and beyond
+    return _lons, _lats, _alts
+
+def _lonDiff (_lons, _refs):
+    return np.abs (geodesy._wrapLongitudes (_lons - _refs))
+
+#########
+# Tests #
+#########
+
+@pytest.mark.parametrize ('_points', ['randomLLA', 'polarHighLLA'])
+def test_llaToECEF (_points, request):
+    _lons, _lats, _alts = request.getfixturevalue (_points)
+
+    _xyz = np.array (_numpyLLAToECEF (_lons, _lats, _alts))
+    _ref = np.array (_pyprojLLAToECEF (_lons, _lats, _alts))
+
+    assert np.max (np.abs (_xyz - _ref)) < ECEF_TOL
+
+@pytest.mark.parametrize ('_points', ['randomLLA', 'polarHighLLA'])
+def test_ecefToLLA (_points, request):
+    _xs, _ys, _zs = _pyprojLLAToECEF (*request.getfixturevalue (_points))
+
+    _lons, _lats, _alts = _numpyECEFToLLA (_xs, _ys, _zs)
+    _rLons, _rLats, _rAlts = _pyprojECEFToLLA (_xs, _ys, _zs)
+
+    assert np.max (np.abs (_lats - _rLats)) < PROJ_LAT_TOL
+    assert np.all (np.abs (_alts - _rAlts) < PROJ_ALT_TOL + PROJ_ALT_REL * np.abs (_rAlts))
+
+    # Longitude is undefined on the polar axis
+
+    _offAxis = np.hypot (_xs, _ys) > 1.0
+    assert np.max (_lonDiff (_lons, _rLons)[_offAxis]) < LON_TOL
+
+@pytest.mark.parametrize ('_points', ['randomLLA', 'polarHighLLA'])
+def test_roundTrip (_points, request):
+    _lons, _lats, _alts = request.getfixturevalue (_points)
+
+    _rLons, _rLats, _rAlts = _numpyECEFToLLA (*_numpyLLAToECEF (_lons, _lats, _alts))
+
+    _offAxis = np.abs (_lats) < 90.0
+    assert np.max (_lonDiff (_rLons, _lons)[_offAxis]) < LON_TOL
+    assert np.max (np.abs (_rLats - _lats)) < LAT_TOL
+    assert np.max (np.abs (_rAlts - _alts)) < ALT_TOL
+
+def test_scalars (polarHighLLA):
+    for _lon, _lat, _alt in zip (*polarHighLLA):
+        _xyz = _numpyLLAToECEF (float (_lon), float (_lat), float (_alt))
+        _ref = _pyprojLLAToECEF (float (_lon), float (_lat), float (_alt))
+        assert isinstance (_xyz[0], float)
+        assert np.allclose (_xyz, _ref, rtol = 0.0, atol = ECEF_TOL)
+
+        _lla  = _numpyECEFToLLA (*_ref)
+        _rLLA = _pyprojECEFToLLA (*_ref)
+        assert isinstance (_lla[0], float)
+        assert abs (_lla[1] - _rLLA[1]) < PROJ_LAT_TOL
+        assert abs (_lla[2] - _rLLA[2]) < PROJ_ALT_TOL + PROJ_ALT_REL * abs (_rLLA[2])
+
+def test_backend ():
+    try:
+        geodesy.setGeodesyBackend ('numpy')
+        assert geodesy.llaToECEF (10.0, 20.0, 550.0e3) == _numpyLLAToECEF (10.0, 20.0, 550.0e3)
+        geodesy.setGeodesyBackend ('pyproj')
+        assert geodesy.llaToECEF (10.0, 20.0, 550.0e3) == _pyprojLLAToECEF (10.0, 20.0, 550.0e3)
+    finally:
+        geodesy.setGeodesyBackend ('pyproj')
@@ -0,0 +1,111 @@
+# Description
+#
+#   Orbit engine equivalence: every position (lat, lon, alt, delx, dely,
+#   delz) a small inclined constellation publishes from the vector and
+#   scheduler engines, and from their ephemeris look ups, against the
+#   per-satellite thread engine's.
+
+import json
+
+import numpy as np
+import pytest
+
+from   httpPool    import HttpPool
+from   orbitApp    import OrbitApp
+from   orbitEngine import EphemerisCache
+
+ARGV     = ['-N', '3', '--num-planes', '2', '--inclination', '0..60', '--longitude', '0..35',
+            '-I', '10', '-D', '2:00:00', '-E', 'http://127.0.0.1:15052/api/marker', '--virtual-time']
+
+FIELDS   = ('time', 'lat', 'lon', 'alt', 'delx', 'dely', 'delz')
+
+# Ephemeris look ups at EPHEMERIS samples per orbit (interpolated, shifted by Earth's rotation);
+# measured: 3.8e-5 degrees, 1.2e-5 km, 7.2e-10 kps
+
+EPHEMERIS   = 3600
+EPH_DEG_TOL = 4.0e-5        # lat/lon (degrees)
+EPH_ALT_TOL = 2.0e-5        # km
+EPH_VEL_TOL = 1.0e-9        # kps
+
+#############
+# Functions #
+#############
+
+def _publish (monkeypatch, *_moreArgs) -> dict:
+    """
+    Run OrbitApp (command line configuration) and return each
+    satellite's published positions: key: (<plane>, <ordinal>), val:
+    array of FIELDS rows, in publication order.
+    """
+    _rows = dict ()
+
+    def _submit (_url, _key, _payload):
+        _d = json.loads (_payload)
+        _rows.setdefault ((_d['plane'], _d['ordinal']), list ()).append ([_d[_f] for _f in FIELDS])
+
+    monkeypatch.setenv ('CLI', '1')
+    monkeypatch.setattr ('sys.argv', ['orbitApp.py'] + ARGV + list (_moreArgs))
+    monkeypatch.setattr (HttpPool, 'submit', _submit)
+    monkeypatch.setattr (HttpPool, 'flush',  lambda _timeout = None: True)
+
+    EphemerisCache.clear ()
+    OrbitApp ().run ()
+
+    return {_key: np.array (_l) for _key, _l in _rows.items ()}
+
+def _lonDiff (_lons, _refs):
+    return np.abs ((_lons - _refs + 180.0) % 360.0 - 180.0)
+
+@pytest.fixture (scope = 'module')
+def reference ():
+    with pytest.MonkeyPatch.context () as _monkeypatch:
+        return _publish (_monkeypatch, '--engine', 'thread')
+
+#########
+# Tests #
+#########
+
+def test_reference (reference):
+    assert sorted (reference) == [(_p, _s) for _p in (1, 2) for _s in (1, 2, 3)]
+    for _rows in reference.values ():
+        assert _rows.shape == (720, len (FIELDS))
+        assert np.all (np.diff (_rows[:, 0]) > 0.0)
+
+@pytest.mark.parametrize ('_engineArgs', [('--engine', 'vector'),
+                                          ('--engine', 'scheduler'),
+                                          ('--engine', 'scheduler', '--workers', '2')])
+def test_engines (monkeypatch, reference, _engineArgs):
+    _published = _publish (monkeypatch, *_engineArgs)
+
+    # The batched engines reproduce the per-satellite loop's positions bit for bit (and its
+    # velocities, from the same closed form, to rounding)
+
+    assert sorted (_published) == sorted (reference)
+    for _key, _ref in reference.items ():
+        _rows = _published[_key]
+        assert _rows.shape == _ref.shape, _key
+        assert np.array_equal (_rows[:, :4], _ref[:, :4]), _key
+        assert np.allclose (_rows[:, 4:], _ref[:, 4:], rtol = 0.0, atol = 1.0e-14), _key
+
+@pytest.mark.parametrize ('_engine', ['vector', 'scheduler'])
+def test_ephemeris (monkeypatch, tmp_path, reference, _engine):
+    _runs = [_publish (monkeypatch, '--engine', _engine, '--ephemeris', str (EPHEMERIS), *_moreArgs)
+             for _moreArgs in [(), ('--ephemeris-dir', str (tmp_path))]]     # per process, and shared (memory-mapped) files
+
+    assert list (tmp_path.glob ('*.npy'))
+
+    for _published in _runs:
+        assert sorted (_published) == sorted (reference)
+        for _key, _ref in reference.items ():
+            _rows = _published[_key]
+            assert _rows.shape == _ref.shape, _key
+            assert np.array_equal (_rows[:, 0], _ref[:, 0]), _key
+            assert np.abs   (_rows[:, 1] - _ref[:, 1]).max () < EPH_DEG_TOL, _key
+            assert _lonDiff (_rows[:, 2],  _ref[:, 2]).max () < EPH_DEG_TOL, _key
+            assert np.abs   (_rows[:, 3] - _ref[:, 3]).max () < EPH_ALT_TOL, _key
+            assert np.abs   (_rows[:, 4:] - _ref[:, 4:]).max () < EPH_VEL_TOL, _key
+
+    # Shared tables are the per process tables
+
+    for _key, _rows in _runs[0].items ():
+        assert np.array_equal (_runs[1][_key], _rows), _key
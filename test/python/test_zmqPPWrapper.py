@@ -0,0 +1,76 @@
+# Description
+#
+#   ZmqPPWrapper's encoder/decoder pairs, notably the struct position codec.
+
+import math
+
+import pytest
+
+from   ZmqPPWrapper import ZmqPPWrapperType, ZmqPPEncoderFor, ZmqPPDecoderFor, POSITION_CODEC
+
+def _position (_iPlane: int = 3, _iSat: int = 7, **_kwargs) -> dict:
+    _rec = {'label':    f'leosat-{_iPlane:02d}-{_iSat:02d}',
+            'plane':    _iPlane,
+            'ordinal':  _iSat,
+            'lat':      12.345678901234,
+            'lon':      -98.7654321,
+            'alt':      550.1234,
+            'delx':     1.5,
+            'dely':     -2.25,
+            'delz':     3.125,
+            'time':     1760000000.123456,
+            'interval': 0.1}
+    _rec.update (_kwargs)
+    return _rec
+
+#########
+# Tests #
+#########
+
+@pytest.mark.parametrize ('_color', [None, 'bg-green-500', 'bg-pink-500', 'bg-yellow-500', 'bg-red-500'])
+def test_positionRoundTrip (_color):
+    _rec = _position (color = _color) if _color else _position ()
+
+    _buf = ZmqPPEncoderFor (ZmqPPWrapperType.POSITION) (_rec)
+
+    assert len (_buf) == POSITION_CODEC.size == 69
+    assert ZmqPPDecoderFor (ZmqPPWrapperType.POSITION) (_buf) == _rec     # exact: doubles, and the derived label
+
+def test_positionsRoundTrip ():
+    _recs = [_position (_iPlane, _iSat, color = 'bg-pink-500' if _iSat % 2 else None) for _iPlane in range (1, 4) for _iSat in range (1, 61)]
+    for _rec in _recs:
+        if _rec['color'] is None:
+            del _rec['color']
+
+    _buf = ZmqPPEncoderFor (ZmqPPWrapperType.POSITIONS) (_recs)
+
+    assert len (_buf) == len (_recs) * POSITION_CODEC.size
+    assert ZmqPPDecoderFor (ZmqPPWrapperType.POSITIONS) (_buf) == _recs
+    assert ZmqPPDecoderFor (ZmqPPWrapperType.POSITIONS) (memoryview (_buf)) == _recs     # e.g., a zero-copy zmq.Frame's buffer
+    assert ZmqPPDecoderFor (ZmqPPWrapperType.POSITIONS) (ZmqPPEncoderFor (ZmqPPWrapperType.POSITIONS) ([])) == []
+
+def test_positionMissingFields ():
+    _rec = POSITION_CODEC.decode (POSITION_CODEC.encode ({'plane': 1, 'ordinal': 2}))
+
+    assert _rec['label'] == 'leosat-01-02'
+    assert math.isnan (_rec['lat']) and math.isnan (_rec['interval'])
+    assert 'color' not in _rec
+
+def test_positionUnknownColor ():
+    with pytest.raises (ValueError):
+        POSITION_CODEC.encode (_position (color = 'bg-cyan-500'))
+    with pytest.raises (ValueError):
+        POSITION_CODEC.encodeMany ([_position (), _position (color = 'bg-cyan-500')])
+
+@pytest.mark.parametrize ('_type, _msg', [(ZmqPPWrapperType.BYTES, b'\x00\x01'),
+                                          (ZmqPPWrapperType.STR,   'stop'),
+                                          (ZmqPPWrapperType.JSON,  {'plane': 1, 'ordinal': '1..3'}),
+                                          (ZmqPPWrapperType.PYOBJ, {'start-time': 1.5, 'nodes': {'a': (0, 3)}})])
+def test_roundTrip (_type, _msg):
+    assert ZmqPPDecoderFor (_type) (ZmqPPEncoderFor (_type) (_msg)) == _msg
+
+def test_wrapperTypes ():
+    for _type in ZmqPPWrapperType:
+        assert _type.value == (_type.name,)
+        assert _type.lower == _type.name.lower ()
+        assert ZmqPPEncoderFor (_type) and ZmqPPDecoderFor (_type)
@@ -0,0 +1,183 @@
+# Description
+#
+#   ZmqPublisher's queue: batched draining, the high-water mark policies,
+#   and the urgent lane's bounded latency with the bulk lane flooded past
+#   its high-water mark (QController's control topics).
+
+import json
+import threading
+import time
+
+import pytest
+import zmq
+
+from   QController  import FlaskQController
+from   ZmqPPWrapper import ZmqPPWrapperType
+from   ZmqPublisher import ZmqPublisher
+
+URGENT_TOPICS = FlaskQController.URGENT_TOPICS
+BULK_TOPIC    = 'thirdParty'
+
+QUEUE_HWM     = 1000        # bulk lane
+FLOOD         = 200000      # bulk messages
+URGENT_EVERY  = 0.005       # seconds
+URGENT_BOUND  = 0.25        # seconds, max urgent queue-to-receipt latency (an unprioritized FIFO: seconds)
+
+#############
+# Functions #
+#############
+
+def _connect (_pub: ZmqPublisher):
+    """
+    Return a subscriber (with an unbounded receive queue) connected to
+    _pub and receiving.
+    """
+    _sub = zmq.Context.instance ().socket (zmq.SUB)
+    _sub.setsockopt (zmq.SUBSCRIBE, b'')
+    _sub.setsockopt (zmq.RCVHWM, 0)
+    _sub.setsockopt (zmq.LINGER, 0)
+    _sub.connect (_pub.socket.getsockopt (zmq.LAST_ENDPOINT))
+
+    while True:     # slow joiner
+        _pub.publishMsg ({}, 'probe')
+        if _sub.poll (50):
+            break
+
+    while _sub.poll (100):
+        _sub.recv_multipart ()
+
+    return _sub
+
+class _Receiver (threading.Thread):
+
+    def __init__ (self, _sub):
+        super ().__init__ (daemon = True)
+        self._sub  = _sub
+        self._stop = threading.Event ()
+        self.bulk  = 0          # last bulk sequence number received
+        self.recvd = list ()    # urgent: (<topic>, <message>, <bulk received before it>, <received at>)
+        self.start ()
+
+    def stop (self):
+        self._stop.set ()
+        self.join ()            # before closing the socket (it is not thread-safe)
+
+    def run (self):
+        while not self._stop.is_set ():
+            if not self._sub.poll (50):
+                continue
+
+            _topic, _msg = self._sub.recv_multipart ()
+            _msg = json.loads (_msg)
+            if _topic == BULK_TOPIC.encode ():
+                self.bulk = _msg['seq']
+            else:
+                self.recvd.append ((_topic.decode (), _msg, self.bulk, time.monotonic ()))
+
+@pytest.fixture
+def publisher (request):
+    _pub = ZmqPublisher (None, 'tcp://127.0.0.1:*', '', ZmqPPWrapperType.JSON,
+                         queue_hwm     = QUEUE_HWM,
+                         queue_policy  = request.param,
+                         urgent_topics = URGENT_TOPICS,
+                         subscribers   = 0)
+    _sub = _connect (_pub)
+    _pub.run ()
+
+    _receiver = _Receiver (_sub)
+
+    yield _pub, _receiver
+
+    _receiver.stop ()
+    _pub.terminate ()
+    _sub.close ()
+
+#########
+# Tests #
+#########
+
+@pytest.mark.parametrize ('publisher', ['drop', 'block'], indirect = True)
+def test_urgentLatencyUnderLoad (publisher):
+    _pub, _receiver = publisher
+
+    def _flood ():
+        for _seq in range (1, FLOOD + 1):
+            _pub.queue_message ({'seq': _seq}, BULK_TOPIC)
+
+    _flooder = threading.Thread (target = _flood, daemon = True)
+    _flooder.start ()
+
+    # Urgent topics while the bulk lane is at its high-water mark; the oldest bulk message still
+    # queued is read atomically with queuing each (the queue's Condition wraps an RLock)
+
+    _sent = list ()     # (<topic>, <oldest queued bulk sequence number or None>, <queue_message () seconds>)
+    while _flooder.is_alive () and len (_sent) < 100:
+        time.sleep (URGENT_EVERY)
+
+        _topic = URGENT_TOPICS[len (_sent) % len (URGENT_TOPICS)]
+        with _pub._zmq_qlock:
+            _oldest = _pub._zmq_queue[0][1]['seq'] if len (_pub._zmq_queue) >= QUEUE_HWM // 2 else None
+            _t0     = time.monotonic ()
+            _pub.queue_message ({'n': len (_sent), 'queued': _t0}, _topic)
+        _sent.append ((_topic, _oldest, time.monotonic () - _t0))
+
+    _flooder.join (60.0)
+    assert not _flooder.is_alive ()
+    assert len (_sent) >= 50, 'the bulk flood ended too soon'
+
+    # Wait for the queue to drain
+
+    _deadline = time.monotonic () + 30.0
+    while ((_stats := _pub.stats ())['published'] + _stats['dropped'] < _stats['queued'] or \
+           len (_receiver.recvd) < len (_sent)) and time.monotonic () < _deadline:
+        time.sleep (0.05)
+
+    # Every urgent message is delivered, in order, within the bound
+
+    assert [(_topic, _msg['n']) for _topic, _msg, _, _ in _receiver.recvd] == \
+           [(_topic, _n) for _n, (_topic, _, _) in enumerate (_sent)]
+
+    _lates = [_at - _msg['queued'] for _, _msg, _, _at in _receiver.recvd]
+    assert max (_lates) < URGENT_BOUND
+    assert _stats['urgent'] == len (_sent)
+    assert _stats['maxUrgent'] < URGENT_BOUND
+
+    # ... and ahead of every bulk message queued before it
+
+    _loaded = [(_i, _oldest) for _i, (_, _oldest, _) in enumerate (_sent) if _oldest is not None]
+    assert len (_loaded) >= len (_sent) // 2, 'the bulk lane was not loaded'
+    for _i, _oldest in _loaded:
+        _, _, _bulkBefore, _ = _receiver.recvd[_i]
+        assert _bulkBefore < _oldest
+
+    # The urgent lane never blocks (cf., 'block') and is never dropped (cf., 'drop')
+
+    assert max ([_secs for _, _, _secs in _sent]) < URGENT_BOUND
+    if _pub._queue_policy == 'drop':
+        assert _stats['dropped'] > 0
+        assert _stats['published'] + _stats['dropped'] == _stats['queued']
+    else:
+        assert _stats['dropped'] == 0
+        assert _stats['maxDepth'] <= QUEUE_HWM
+
+@pytest.mark.parametrize ('publisher', ['block'], indirect = True)
+def test_bulkDeliveredInOrder (publisher):
+    _pub, _receiver = publisher
+
+    for _seq in range (1, 5001):
+        _pub.queue_message ({'seq': _seq}, BULK_TOPIC)
+    _pub.queue_message ({'n': 0, 'queued': time.monotonic ()}, 'stop')
+
+    _deadline = time.monotonic () + 10.0
+    while (_receiver.bulk < 5000 or not _receiver.recvd) and time.monotonic () < _deadline:
+        time.sleep (0.01)
+
+    # Nothing is left queued (the lost wakeup a trailing 'stop' used to suffer)
+
+    assert _receiver.bulk == 5000
+    assert [_topic for _topic, _, _, _ in _receiver.recvd] == ['stop']
+    assert _pub.stats ()['published'] == 5001
+
+def test_queuePolicy ():
+    with pytest.raises (ValueError):
+        ZmqPublisher (None, 'tcp://127.0.0.1:*', queue_policy = 'spill', subscribers = 0)
@@ -0,0 +1,172 @@
+# Description
+#
+#   ZmqSubscriber (zmq.asyncio): inline and worker-pool callback dispatch,
+#   per-topic and (ordered) cross-topic ordering, and terminate ()
+#   (including with reception paused at maxPending).
+
+import threading
+import time
+
+import pytest
+import zmq
+
+from   ZmqPPWrapper  import ZmqPPWrapperType
+from   ZmqSubscriber import ZmqSubscriber
+
+MESSAGES = 300              # per topic
+
+#############
+# Functions #
+#############
+
+@pytest.fixture
+def pubSocket ():
+    _pub = zmq.Context.instance ().socket (zmq.PUB)
+    _pub.setsockopt (zmq.LINGER, 0)
+    _pub.bind ('tcp://127.0.0.1:*')
+
+    yield _pub
+
+    _pub.close ()
+
+def _start (_pub, _callback, **_kwargs):
+    """
+    Return a running subscriber (and its thread) that has received a
+    probe message from _pub.
+    """
+    _probed = threading.Event ()
+
+    def _cb (_topic, _msg):
+        if _topic == 'probe':
+            _probed.set ()
+        else:
+            _callback (_topic, _msg)
+
+    _sub    = ZmqSubscriber (None, _pub.getsockopt (zmq.LAST_ENDPOINT).decode (), '', _cb, ZmqPPWrapperType.JSON, False, **_kwargs)
+    _thread = threading.Thread (target = _sub.run, daemon = True)
+    _thread.start ()
+
+    while not _probed.wait (0.05):     # slow joiner
+        _pub.send_multipart ([b'probe', b'{}'])
+
+    return _sub, _thread
+
+def _publish (_pub):
+    for _i in range (MESSAGES):
+        _pub.send_multipart ([b'slow', b'{"i": %d}' % _i])
+        _pub.send_multipart ([b'fast', b'{"i": %d}' % _i])
+
+#########
+# Tests #
+#########
+
+@pytest.mark.parametrize ('_kwargs', [{}, {'workers': 4}, {'workers': 2, 'maxPending': 8}])
+def test_perTopicOrder (pubSocket, _kwargs):
+    _seen = {'slow': list (), 'fast': list ()}
+    _lock = threading.Lock ()
+
+    def _callback (_topic, _msg):
+        if _topic == 'slow':
+            time.sleep (0.001)
+        with _lock:
+            _seen[_topic].append ((_msg['i'], threading.current_thread ().name))
+
+    _sub, _thread = _start (pubSocket, _callback, **_kwargs)
+    _publish (pubSocket)
+
+    _deadline = time.monotonic () + 10.0
+    while sum ([len (_l) for _l in _seen.values ()]) < 2 * MESSAGES and time.monotonic () < _deadline:
+        time.sleep (0.01)
+
+    _sub.terminate ()
+    _thread.join (2.0)
+
+    assert not _thread.is_alive ()
+    for _topic in _seen:
+        assert [_i for _i, _ in _seen[_topic]] == list (range (MESSAGES))
+
+    # Callbacks run on the event loop's thread, or on the worker pool's
+
+    _names = {_name for _l in _seen.values () for _, _name in _l}
+    assert all ([_name.startswith ('ZMQ callback') for _name in _names]) == bool (_kwargs)
+
+@pytest.mark.parametrize ('_kwargs', [{}, {'workers': 1, 'ordered': True}, {'workers': 4, 'ordered': True, 'maxPending': 2}])
+def test_crossTopicOrder (pubSocket, _kwargs):
+    _seen = list ()
+    _done = threading.Event ()
+
+    def _callback (_topic, _msg):
+        if _topic == 'start':
+            time.sleep (0.05)   # a slow 'start' must not let a later 'start' overtake the 'stop' between them
+        _seen.append ((_topic, _msg['i']))
+        if len (_seen) == 3 * 20:
+            _done.set ()
+
+    _sub, _thread = _start (pubSocket, _callback, **_kwargs)
+
+    _sent = list ()
+    for _i in range (20):
+        for _topic in ('start', 'stop', 'shard') if _i % 2 else ('start', 'shard', 'stop'):
+            pubSocket.send_multipart ([_topic.encode (), b'{"i": %d}' % _i])
+            _sent.append ((_topic, _i))
+
+    assert _done.wait (10.0)
+
+    _sub.terminate ()
+    _thread.join (2.0)
+
+    assert not _thread.is_alive ()
+    assert _seen == _sent
+
+def test_workersDecoupleTopics (pubSocket):
+    _fastDone = threading.Event ()
+    _counts   = {'slow': 0, 'fast': 0}
+
+    def _callback (_topic, _msg):
+        if _topic == 'slow':
+            time.sleep (0.002)
+        _counts[_topic] += 1
+        if _counts['fast'] == MESSAGES:
+            _fastDone.set ()
+
+    _sub, _thread = _start (pubSocket, _callback, workers = 4)
+    _publish (pubSocket)
+
+    # 'fast' completes while 'slow' (>= 0.6 s of callbacks) is still being handled
+
+    assert _fastDone.wait (5.0)
+    assert _counts['slow'] < MESSAGES
+
+    _sub.terminate ()
+    _thread.join (2.0)
+    assert not _thread.is_alive ()
+
+def test_terminateAtMaxPending (pubSocket):
+    _release = threading.Event ()
+    _entered = threading.Semaphore (0)
+
+    def _callback (_topic, _msg):
+        _entered.release ()
+        _release.wait ()        # hold the workers: maxPending messages stay pending
+
+    _sub, _thread = _start (pubSocket, _callback, workers = 2, maxPending = 4)
+    _publish (pubSocket)
+
+    assert _entered.acquire (timeout = 5.0)
+    time.sleep (0.2)            # reception pauses at maxPending
+
+    _sub.terminate ()
+    _thread.join (2.0)
+    _release.set ()
+
+    assert not _thread.is_alive (), 'terminate () did not stop a subscriber paused at maxPending'
+
+def test_terminateBeforeRun (pubSocket):
+    _sub = ZmqSubscriber (None, pubSocket.getsockopt (zmq.LAST_ENDPOINT).decode (), '', lambda _topic, _msg: None, ZmqPPWrapperType.JSON)
+    _sub.terminate ()
+
+    _thread = threading.Thread (target = _sub.run, daemon = True)
+    _thread.start ()
+    _thread.join (2.0)
+
+    assert not _thread.is_alive ()